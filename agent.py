@@ -1,8 +1,15 @@
 """AI Agent for drone operations coordination."""
 import os
-import json
-from typing import Optional, Dict, Any, List
-from groq import Groq
+import re
+import logging
+import asyncio
+import threading
+from collections import deque
+from functools import partial, lru_cache
+from typing import Optional, Dict, Any, List, Awaitable, Callable, Tuple, Deque, Union, Iterator, AsyncIterator, NamedTuple
+import orjson
+from cachetools import TTLCache
+from groq import AsyncGroq, DefaultAioHttpClient
 from dotenv import load_dotenv
 
 from sheets_sync import GoogleSheetsSync
@@ -11,48 +18,317 @@ from inventory_manager import InventoryManager
 from assignment_tracker import AssignmentTracker
 from conflict_detector import ConflictDetector
 
+logger = logging.getLogger(__name__)
+
 # Load environment variables
 load_dotenv(override=True)  # Ensure .env file is loaded
 
+# Read once at import; override=True above already gives .env precedence
+_API_KEY = (os.getenv('GROQ_API_KEY') or '').strip()
+
+# Number of prior chat messages sent to the LLM with each turn
+CHAT_HISTORY_LIMIT = 10
+
+# Read-tool results are reused for this long unless a write clears them first
+_TOOL_CACHE_TTL = 30  # seconds
+_TOOL_CACHE_SIZE = 256
+
+# Intent patterns, matched against the lowercased message. Only intents whose
+# trigger below doesn't already pin down the whole pattern need a second check.
+_PATTERNS = {
+    'pilot': re.compile(r'\b(find|query|show|available|list)\s+.*\b(pilot|pilots)\b'),
+    'drone': re.compile(r'\b(find|query|show|available|list)\s+.*\b(drone|drones)\b'),
+    'assign': re.compile(r'\b(assign|assign.*to|match)\b'),
+    'project': re.compile(r'\b(prj|project|mission)\b\s*\d+'),
+    'status': re.compile(r'\b(update|change|set).*\b(status|state)\b'),
+}
+
+# Trigger keywords per intent, fused into a single regex so one scan finds
+# every intent present; the named group that matched is the intent.
+# cost/conflict/reassign triggers are their full patterns.
+_INTENT_TRIGGERS = {
+    'pilot': r'\bpilot',
+    'drone': r'\bdrone',
+    'assign': r'\b(?:assign|match)',
+    'project': r'\b(?:project|mission|prj)',
+    'cost': r'\b(?:calculate|price|cost)\b',
+    'conflict': r'\b(?:conflict|check)\b',
+    'status': r'\b(?:status|state)',
+    # "re-assign" must also leave "assign" for the assign intent, so only "re" is consumed
+    'reassign': r'\b(?:reassign|urgent)\b|\bre(?=-assign\b)',
+}
+_INTENT_RE = re.compile('|'.join(f'(?P<{name}>{trigger})' for name, trigger in _INTENT_TRIGGERS.items()))
+
+# Function-calling schema for the tools, offered to the LLM when no intent
+# pattern matches the message so it can pick tools itself
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "query_pilots",
+            "description": "Query pilots by skills, location, certifications, or status",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Free-text filter, e.g. 'available mapping pilots in Bangalore'"},
+                },
+                "required": ["query"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "query_drones",
+            "description": "Query drones by capabilities, location, status, or weather compatibility",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Free-text filter, e.g. 'available thermal drones for rainy weather'"},
+                },
+                "required": ["query"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "calculate_cost",
+            "description": "Calculate total cost for a pilot for a mission duration",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "pilot_id": {"type": "string", "description": "Pilot ID, e.g. P001"},
+                    "start_date": {"type": "string", "description": "YYYY-MM-DD"},
+                    "end_date": {"type": "string", "description": "YYYY-MM-DD"},
+                },
+                "required": ["pilot_id", "start_date", "end_date"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "assign_to_mission",
+            "description": "Assign a pilot and drone to a mission (auto-matches best options)",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "project_id": {"type": "string", "description": "Project ID, e.g. PRJ001"},
+                },
+                "required": ["project_id"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "check_conflicts",
+            "description": "Check for conflicts in current assignments",
+            "parameters": {"type": "object", "properties": {}},
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "update_pilot_status",
+            "description": "Update pilot status",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "pilot_id": {"type": "string", "description": "Pilot ID, e.g. P001"},
+                    "status": {"type": "string", "enum": ["Available", "Assigned", "On Leave", "Unavailable"]},
+                },
+                "required": ["pilot_id", "status"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_mission_info",
+            "description": "Get information about a mission/project",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "project_id": {"type": "string", "description": "Project ID, e.g. PRJ001"},
+                },
+                "required": ["project_id"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "handle_urgent_reassignment",
+            "description": "Handle urgent reassignment for a project",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "project_id": {"type": "string", "description": "Project ID, e.g. PRJ001"},
+                },
+                "required": ["project_id"],
+            },
+        },
+    },
+]
+
+# Deterministic commands ("check conflicts", "assign PRJ001") are answered by
+# the tool alone when the message is this short and not a question
+_FAST_PATH_MAX_WORDS = 8
+
+# Query keyword -> (filter slot, value) for the pilot/drone query tools.
+# Order matters: the first keyword present claims its slot.
+_PILOT_KEYWORDS = {
+    'mapping': ('skills', ['Mapping']),
+    'inspection': ('skills', ['Inspection']),
+    'thermal': ('skills', ['Thermal']),
+    'survey': ('skills', ['Survey']),
+    'bangalore': ('location', 'Bangalore'),
+    'mumbai': ('location', 'Mumbai'),
+    'available': ('status', 'Available'),
+    'leave': ('status', 'On Leave'),
+    'dgca': ('certifications', ['DGCA']),
+}
+_DRONE_KEYWORDS = {
+    'thermal': ('capabilities', ['Thermal']),
+    'rgb': ('capabilities', ['RGB']),
+    'lidar': ('capabilities', ['LiDAR']),
+    'bangalore': ('location', 'Bangalore'),
+    'mumbai': ('location', 'Mumbai'),
+    'available': ('status', 'Available'),
+    'rain': ('weather_forecast', 'Rainy'),
+    'sunny': ('weather_forecast', 'Sunny'),
+    'cloudy': ('weather_forecast', 'Cloudy'),
+}
+
+# Argument extractors, matched against the original message
+_PILOT_ID_RE = re.compile(r'[Pp]\d{3}')
+_PRJ_RE = re.compile(r'[Pp][Rr][Jj]\d{3}')
+_PROJECT_NUM_RE = re.compile(r'\b(project|mission|prj)\b\s*(\d{3})', re.IGNORECASE)
+_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+_STATUS_RE = re.compile(r'(Available|Assigned|On Leave|Unavailable)', re.IGNORECASE)
+
+
+def _detect_intents(message_lower: str) -> set:
+    """Return the intents whose trigger keywords appear in the message."""
+    return {match.lastgroup for match in _INTENT_RE.finditer(message_lower)}
+
+
+def _parse_filters(query_lower: str, keywords: Dict[str, Tuple[str, Any]]) -> Dict[str, Any]:
+    """Map keywords found in the query to manager filter arguments."""
+    filters = {}
+    for keyword, (slot, value) in keywords.items():
+        if slot not in filters and keyword in query_lower:
+            filters[slot] = value
+    return filters
+
+
+# Thread running the process-wide loop of the synchronous wrapper
+_EVENT_LOOP_THREAD = "agent-event-loop"
+
 
-class DroneOperationsAgent:
-    """AI agent for coordinating drone operations."""
+@lru_cache(maxsize=1)
+def _event_loop() -> asyncio.AbstractEventLoop:
+    """Process-wide event loop on a daemon thread, for the synchronous chat() wrapper."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name=_EVENT_LOOP_THREAD, daemon=True).start()
+    return loop
+
+
+# Event loop -> (its Groq client, the task that closes it), see _groq_client
+_groq_clients: Dict[asyncio.AbstractEventLoop, Tuple[AsyncGroq, Optional[asyncio.Task]]] = {}
+_groq_clients_lock = threading.Lock()
+
+
+def _groq_client(loop: asyncio.AbstractEventLoop) -> AsyncGroq:
+    """Groq client shared by every agent running on `loop` (call it from there).
+    
+    The aiohttp session behind it is bound to the loop it first runs on, so
+    there is one client (and connection pool) per loop rather than per agent.
+    It is closed and forgotten when the loop shuts down (except on the
+    process-wide loop, which runs until exit).
+    """
+    with _groq_clients_lock:
+        entry = _groq_clients.get(loop)
+        if entry is None:
+            # Loops closed without a clean shutdown can't close their client
+            # any more; at least don't keep them alive
+            for closed in [other for other in _groq_clients if other.is_closed()]:
+                del _groq_clients[closed]
+            client = AsyncGroq(api_key=_API_KEY, http_client=DefaultAioHttpClient())
+            closer = None
+            if threading.current_thread().name != _EVENT_LOOP_THREAD:
+                closer = loop.create_task(_close_on_shutdown(loop, client))
+            entry = _groq_clients[loop] = (client, closer)
+    return entry[0]
+
+
+async def _close_on_shutdown(loop: asyncio.AbstractEventLoop, client: AsyncGroq) -> None:
+    """Wait for `loop` to shut down (asyncio.run cancels the tasks left on
+    it), then close its Groq client and drop it from _groq_clients."""
+    try:
+        await asyncio.Event().wait()
+    finally:
+        with _groq_clients_lock:
+            _groq_clients.pop(loop, None)
+        await client.close()
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize a tool result to compact JSON (numpy scalars/arrays allowed)."""
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+async def _noop() -> None:
+    """Stand-in tool call for messages that don't map to a tool."""
+    return None
+
+
+class _Candidate(NamedTuple):
+    """A tool call picked by _classify, not yet run."""
+    label: str
+    call: Callable[[], Awaitable[str]]
+    # Marker in the result that sends dispatch on to the next candidate
+    empty_marker: Optional[str]
+    # The tool's output alone answers the message
+    authoritative: bool
+    # Safe to start before knowing whether an earlier candidate answers
+    read_only: bool
+
+
+class AsyncDroneOperationsAgent:
+    """AI agent for coordinating drone operations (asyncio API).
+    
+    Every entry point is a coroutine, so one event loop can serve many chat
+    sessions at once while their LLM and Sheets calls are in flight. Use
+    DroneOperationsAgent for blocking callers such as Streamlit.
+    """
     
     def __init__(self):
-        # Initialize components
-        self.sheets_sync = GoogleSheetsSync()
-        self.roster_manager = RosterManager(self.sheets_sync)
-        self.inventory_manager = InventoryManager(self.sheets_sync)
-        self.assignment_tracker = AssignmentTracker(
-            self.sheets_sync,
-            self.roster_manager,
-            self.inventory_manager
-        )
-        self.conflict_detector = ConflictDetector(
-            self.sheets_sync,
-            self.roster_manager,
-            self.inventory_manager,
-            self.assignment_tracker
-        )
+        # Data components are created lazily (see the properties below) so
+        # constructing the agent doesn't pay for Sheets auth and reads up front.
+        # The agent is shared across sessions and worker threads, so each is
+        # built under a lock (reentrant: the tracker builds the managers).
+        self._components_lock = threading.RLock()
+        self._sheets_sync: Optional[GoogleSheetsSync] = None
+        self._roster_manager: Optional[RosterManager] = None
+        self._inventory_manager: Optional[InventoryManager] = None
+        self._assignment_tracker: Optional[AssignmentTracker] = None
+        self._conflict_detector: Optional[ConflictDetector] = None
         
         # Initialize Groq client
-        # Read API key directly from .env to avoid env/Process issues
-        from dotenv import dotenv_values
-        env_vars = dotenv_values('.env')
-        api_key = (env_vars.get('GROQ_API_KEY') or '').strip()
-
-        if not api_key:
-            # Fallback to environment variable if .env missing
-            api_key = (os.getenv('GROQ_API_KEY') or '').strip()
-
-        if not api_key:
+        if not _API_KEY:
             raise ValueError(
                 "GROQ_API_KEY not found. Please ensure it is set in your .env file "
                 "at the project root (GROQ_API_KEY=...) or as an environment variable. "
                 "Get your API key from https://console.groq.com"
             )
         
-        self.client = Groq(api_key=api_key)
+        # Read-tool results keyed by parsed criteria; only touched from the event loop
+        self._pilot_cache = TTLCache(maxsize=_TOOL_CACHE_SIZE, ttl=_TOOL_CACHE_TTL)
+        self._drone_cache = TTLCache(maxsize=_TOOL_CACHE_SIZE, ttl=_TOOL_CACHE_TTL)
+        self._mission_cache = TTLCache(maxsize=_TOOL_CACHE_SIZE, ttl=_TOOL_CACHE_TTL)
         self.model = "llama-3.3-70b-versatile"  # Updated from decommissioned llama-3.1-70b-versatile
         
         # System prompt
@@ -78,7 +354,65 @@ Available functions you can call:
 
 When the user asks a question, analyze what function(s) you need to call and provide helpful responses."""
     
-    def _call_tool(self, tool_name: str, **kwargs) -> str:
+    @property
+    def client(self) -> AsyncGroq:
+        """Groq client for the running event loop."""
+        return _groq_client(asyncio.get_running_loop())
+    
+    def _component(self, attr: str, build: Callable[[], Any]) -> Any:
+        """The data component stored in `attr`, built on first use exactly
+        once, even when several threads ask for it at the same time."""
+        component = getattr(self, attr)
+        if component is None:
+            with self._components_lock:
+                component = getattr(self, attr)
+                if component is None:
+                    component = build()
+                    setattr(self, attr, component)
+        return component
+    
+    @property
+    def sheets_sync(self) -> GoogleSheetsSync:
+        return self._component('_sheets_sync', GoogleSheetsSync)
+    
+    @property
+    def roster_manager(self) -> RosterManager:
+        return self._component('_roster_manager', lambda: RosterManager(self.sheets_sync))
+    
+    @property
+    def inventory_manager(self) -> InventoryManager:
+        return self._component('_inventory_manager', lambda: InventoryManager(self.sheets_sync))
+    
+    @property
+    def assignment_tracker(self) -> AssignmentTracker:
+        return self._component('_assignment_tracker', self._build_assignment_tracker)
+    
+    def _build_assignment_tracker(self) -> AssignmentTracker:
+        # The tracker (with its roster and fleet managers) reads all three
+        # sheets on construction; fetch them in parallel first
+        self.sheets_sync.prefetch_all()
+        return AssignmentTracker(
+            self.sheets_sync,
+            self.roster_manager,
+            self.inventory_manager
+        )
+    
+    @property
+    def conflict_detector(self) -> ConflictDetector:
+        return self._component('_conflict_detector', self._build_conflict_detector)
+    
+    def _build_conflict_detector(self) -> ConflictDetector:
+        # The tracker first: building it prefetches all three sheets at once,
+        # before the managers would read theirs one at a time
+        assignment_tracker = self.assignment_tracker
+        return ConflictDetector(
+            self.sheets_sync,
+            self.roster_manager,
+            self.inventory_manager,
+            assignment_tracker
+        )
+    
+    async def _call_tool(self, tool_name: str, **kwargs) -> str:
         """Call a tool function by name."""
         tools = {
             "query_pilots": self._query_pilots,
@@ -95,48 +429,25 @@ When the user asks a question, analyze what function(s) you need to call and pro
             return f"Unknown tool: {tool_name}"
         
         try:
-            return tools[tool_name](**kwargs)
+            return await tools[tool_name](**kwargs)
         except Exception as e:
             return f"Error calling {tool_name}: {str(e)}"
     
-    def _query_pilots(self, query: str = "") -> str:
-        """Query pilots by skills, location, certifications, or status."""
-        import json
-        query_lower = query.lower() if query else ""
-        
-        skills = None
-        location = None
-        status = None
-        certifications = None
-        
-        if "mapping" in query_lower:
-            skills = ["Mapping"]
-        elif "inspection" in query_lower:
-            skills = ["Inspection"]
-        elif "thermal" in query_lower:
-            skills = ["Thermal"]
-        elif "survey" in query_lower:
-            skills = ["Survey"]
-        
-        if "bangalore" in query_lower:
-            location = "Bangalore"
-        elif "mumbai" in query_lower:
-            location = "Mumbai"
-        
-        if "available" in query_lower:
-            status = "Available"
-        elif "on leave" in query_lower or "leave" in query_lower:
-            status = "On Leave"
-        
-        if "dgca" in query_lower:
-            certifications = ["DGCA"]
-        
-        df = self.roster_manager.query_pilots(
-            skills=skills,
-            certifications=certifications,
-            location=location,
-            status=status
-        )
+    async def _query_pilots(self, query: str = "", query_lower: Optional[str] = None) -> str:
+        """Query pilots by skills, location, certifications, or status.
+        
+        Callers that already lowercased the query can pass it as query_lower.
+        """
+        if query_lower is None:
+            query_lower = query.lower() if query else ""
+        filters = _parse_filters(query_lower, _PILOT_KEYWORDS)
+        
+        key = tuple(sorted((slot, str(value)) for slot, value in filters.items()))
+        cached = self._pilot_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        df = await self._run_batched(lambda: self.roster_manager.query_pilots(**filters))
         
         if len(df) == 0:
             result = {"type": "pilots", "count": 0, "data": [], "message": "No pilots found matching the criteria."}
@@ -144,50 +455,28 @@ When the user asks a question, analyze what function(s) you need to call and pro
             result = {
                 "type": "pilots",
                 "count": len(df),
-                "data": df.to_dict('records'),
+                "data": df.to_dict('list'),  # column -> values, one list per column
                 "message": f"Found {len(df)} pilot(s)"
             }
         
-        return json.dumps(result, indent=2)
-    
-    def _query_drones(self, query: str = "") -> str:
-        """Query drones by capabilities, location, status, or weather compatibility."""
-        import json
-        query_lower = query.lower() if query else ""
-        
-        capabilities = None
-        location = None
-        status = None
-        weather = None
-        
-        if "thermal" in query_lower:
-            capabilities = ["Thermal"]
-        elif "rgb" in query_lower:
-            capabilities = ["RGB"]
-        elif "lidar" in query_lower:
-            capabilities = ["LiDAR"]
-        
-        if "bangalore" in query_lower:
-            location = "Bangalore"
-        elif "mumbai" in query_lower:
-            location = "Mumbai"
-        
-        if "available" in query_lower:
-            status = "Available"
-        
-        if "rain" in query_lower or "rainy" in query_lower:
-            weather = "Rainy"
-        elif "sunny" in query_lower:
-            weather = "Sunny"
-        elif "cloudy" in query_lower:
-            weather = "Cloudy"
-        
-        df = self.inventory_manager.query_drones(
-            capabilities=capabilities,
-            location=location,
-            status=status,
-            weather_forecast=weather
-        )
+        self._pilot_cache[key] = _dumps(result)
+        return self._pilot_cache[key]
+    
+    async def _query_drones(self, query: str = "", query_lower: Optional[str] = None) -> str:
+        """Query drones by capabilities, location, status, or weather compatibility.
+        
+        Callers that already lowercased the query can pass it as query_lower.
+        """
+        if query_lower is None:
+            query_lower = query.lower() if query else ""
+        filters = _parse_filters(query_lower, _DRONE_KEYWORDS)
+        
+        key = tuple(sorted((slot, str(value)) for slot, value in filters.items()))
+        cached = self._drone_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        df = await self._run_batched(lambda: self.inventory_manager.query_drones(**filters))
         
         if len(df) == 0:
             result = {"type": "drones", "count": 0, "data": [], "message": "No drones found matching the criteria."}
@@ -195,17 +484,41 @@ When the user asks a question, analyze what function(s) you need to call and pro
             result = {
                 "type": "drones",
                 "count": len(df),
-                "data": df.to_dict('records'),
+                "data": df.to_dict('list'),  # column -> values, one list per column
                 "message": f"Found {len(df)} drone(s)"
             }
         
-        return json.dumps(result, indent=2)
+        self._drone_cache[key] = _dumps(result)
+        return self._drone_cache[key]
+    
+    async def _run_batched(self, fn: Callable[[], Any]) -> Any:
+        """Run a blocking manager call on a worker thread inside one Sheets batch.
+        
+        The batch is per-thread, so it has to be opened in the worker itself.
+        `fn` takes no arguments and looks up the components it uses when it
+        runs: building one (Sheets auth and reads) on first use must happen
+        in the worker, not on the event loop shared by every session.
+        """
+        def call():
+            with self.sheets_sync.batch():
+                return fn()
+        
+        return await asyncio.to_thread(call)
+    
+    def _invalidate_tool_caches(self):
+        """Drop cached pilot/drone/mission results after a write to the sheets."""
+        self._pilot_cache.clear()
+        self._drone_cache.clear()
+        self._mission_cache.clear()
     
-    def _calculate_cost(self, pilot_id: str, start_date: str, end_date: str) -> str:
+    async def _calculate_cost(self, pilot_id: str, start_date: str, end_date: str) -> str:
         """Calculate total cost for a pilot for a mission duration."""
-        import json
-        cost = self.roster_manager.calculate_cost(pilot_id, start_date, end_date)
-        pilot = self.roster_manager.get_pilot_by_id(pilot_id)
+        def lookup():
+            return (
+                self.roster_manager.calculate_cost(pilot_id, start_date, end_date),
+                self.roster_manager.get_pilot_by_id(pilot_id),
+            )
+        cost, pilot = await self._run_batched(lookup)
         pilot_name = pilot['name'] if pilot is not None else pilot_id
         result = {
             "type": "cost_calculation",
@@ -216,12 +529,12 @@ When the user asks a question, analyze what function(s) you need to call and pro
             "total_cost_inr": round(cost, 2),
             "currency": "INR"
         }
-        return json.dumps(result, indent=2)
+        return _dumps(result)
     
-    def _assign_to_mission(self, project_id: str) -> str:
+    async def _assign_to_mission(self, project_id: str) -> str:
         """Assign a pilot and drone to a mission."""
-        import json
-        result = self.assignment_tracker.create_assignment(project_id)
+        result = await self._run_batched(lambda: self.assignment_tracker.create_assignment(project_id))
+        self._invalidate_tool_caches()
         if result['success']:
             response = {
                 "type": "assignment",
@@ -238,12 +551,11 @@ When the user asks a question, analyze what function(s) you need to call and pro
                 "project_id": project_id,
                 "error": result.get('error', 'Unknown error')
             }
-        return json.dumps(response, indent=2)
+        return _dumps(response)
     
-    def _check_conflicts(self) -> str:
+    async def _check_conflicts(self) -> str:
         """Check for conflicts in current assignments."""
-        import json
-        conflicts = self.conflict_detector.detect_all_conflicts()
+        conflicts = await self._run_batched(lambda: self.conflict_detector.detect_all_conflicts())
         
         total_conflicts = sum(len(v) for v in conflicts.values())
         response = {
@@ -257,12 +569,12 @@ When the user asks a question, analyze what function(s) you need to call and pro
         else:
             response["message"] = f"Found {total_conflicts} conflict(s)"
         
-        return json.dumps(response, indent=2)
+        return _dumps(response)
     
-    def _update_pilot_status(self, pilot_id: str, status: str) -> str:
+    async def _update_pilot_status(self, pilot_id: str, status: str) -> str:
         """Update pilot status."""
-        import json
-        success = self.roster_manager.update_pilot_status(pilot_id, status)
+        success = await self._run_batched(lambda: self.roster_manager.update_pilot_status(pilot_id, status))
+        self._invalidate_tool_caches()
         if success:
             response = {
                 "type": "pilot_status_update",
@@ -279,117 +591,358 @@ When the user asks a question, analyze what function(s) you need to call and pro
                 "error": "Failed to update status",
                 "valid_statuses": ["Available", "Assigned", "On Leave", "Unavailable"]
             }
-        return json.dumps(response, indent=2)
+        return _dumps(response)
     
-    def _get_mission_info(self, project_id: str) -> str:
+    async def _get_mission_info(self, project_id: str) -> str:
         """Get information about a mission/project."""
-        mission = self.assignment_tracker.get_mission_by_id(project_id)
+        cached = self._mission_cache.get(project_id)
+        if cached is not None:
+            return cached
+        
+        mission = await self._run_batched(lambda: self.assignment_tracker.get_mission_by_id(project_id))
         if mission is None:
+            # Not cached: the mission may be added to the sheet at any moment
             return f"Mission {project_id} not found."
         
-        return mission.to_string()
+        info = mission.to_string()
+        self._mission_cache[project_id] = info
+        return info
     
-    def _handle_urgent_reassignment(self, project_id: str) -> str:
+    async def _handle_urgent_reassignment(self, project_id: str) -> str:
         """Handle urgent reassignment for a project."""
-        result = self.assignment_tracker.handle_urgent_reassignment(project_id)
+        result = await self._run_batched(lambda: self.assignment_tracker.handle_urgent_reassignment(project_id))
+        self._invalidate_tool_caches()
         if result['success']:
             return f"Urgent reassignment completed: Pilot {result['pilot_id']} and Drone {result['drone_id']} assigned to {project_id}"
         else:
             return f"Urgent reassignment failed: {result.get('error', 'Unknown error')}"
     
-    def chat(self, message: str, chat_history: Optional[List[Dict]] = None) -> str:
-        """Chat with the agent using Groq API."""
+    async def achat(self, message: str, chat_history: Optional[Union[Deque[Dict], List[Dict]]] = None) -> str:
+        """Chat with the agent using Groq API.
+        
+        The message is classified up front (cheap regex work) and a read-only
+        tool runs concurrently with the completion request, so a turn costs
+        max(LLM, tool) rather than LLM + tool. Tools that write to the sheets
+        only run once the completion is in, so a failed LLM call never leaves
+        behind a write the user wasn't told about. When no pattern matches, the
+        tools are offered to the model via function calling instead; any it
+        calls run concurrently and their results go back to it as role="tool"
+        messages for the final reply.
+        
+        chat_history is ideally a deque(maxlen=CHAT_HISTORY_LIMIT), which is
+        sent as-is; lists are still accepted and trimmed to the last
+        CHAT_HISTORY_LIMIT messages.
+        """
         try:
-            if chat_history is None:
-                chat_history = []
+            tool_call, authoritative, read_only = self._classify(message)
+            if authoritative:
+                # The tool output is the whole answer; skip the LLM round trip
+                return await tool_call()
             
-            # Build messages
-            messages = [{"role": "system", "content": self.system_prompt}]
-            
-            # Add chat history
-            for msg in chat_history[-10:]:  # Keep last 10 messages for context
-                messages.append(msg)
-            
-            # Add current user message
-            messages.append({"role": "user", "content": message})
+            messages = self._build_messages(message, chat_history)
             
             # Call Groq API
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.3,
-                max_tokens=2000
-            )
-            
-            response_text = response.choices[0].message.content
+            llm_task = asyncio.create_task(self.client.chat.completions.create(
+                **self._completion_args(messages, offer_tools=tool_call is None)
+            ))
             
-            # Check if response contains function calls (simple pattern matching)
-            # If user asks for specific operations, call the appropriate tool
-            import re
-            message_lower = message.lower()
+            if read_only:
+                try:
+                    tool_result, response = await asyncio.gather((tool_call or _noop)(), llm_task)
+                except Exception:
+                    # The turn fails either way; don't leave the completion running
+                    llm_task.cancel()
+                    raise
+            else:
+                response = await llm_task
+                tool_result = await tool_call()
             
-            # Use regex for more flexible pattern matching
-            pilot_pattern = r'\b(find|query|show|available|list)\s+.*\b(pilot|pilots)\b'
-            drone_pattern = r'\b(find|query|show|available|list)\s+.*\b(drone|drones)\b'
-            assign_pattern = r'\b(assign|assign.*to|match)\b'
-            project_pattern = r'\b(prj|project|mission)\b\s*\d+'
-            cost_pattern = r'\b(calculate|cost|price)\b'
-            conflict_pattern = r'\b(conflict|check)\b'
-            status_pattern = r'\b(update|change|set).*\b(status|state)\b'
-            reassign_pattern = r'\b(urgent|reassign|re-assign)\b'
+            reply = response.choices[0].message
+            if reply.tool_calls:
+                # The model asked for tools: run them and let it answer from the results
+                tool_calls = [
+                    {"id": c.id, "type": "function",
+                     "function": {"name": c.function.name, "arguments": c.function.arguments}}
+                    for c in reply.tool_calls
+                ]
+                messages, tool_result = await self._run_tool_calls(messages, reply.content, tool_calls)
+                response = await self.client.chat.completions.create(**self._completion_args(messages))
+            response_text = response.choices[0].message.content
             
-            # Pattern matching for tool calls
-            if re.search(pilot_pattern, message_lower):
-                tool_result = self._query_pilots(message)
-                print(f"DEBUG: Found pilot query, result: {tool_result[:100]}")
-                if "no pilots found" not in tool_result.lower():
-                    return tool_result + "\n\n" + response_text
+            if tool_result is not None:
+                return tool_result + "\n\n" + response_text
+            return response_text
             
-            if re.search(drone_pattern, message_lower):
-                tool_result = self._query_drones(message)
-                print(f"DEBUG: Found drone query, result: {tool_result[:100]}")
-                if "no drones found" not in tool_result.lower():
-                    return tool_result + "\n\n" + response_text
+        except Exception as e:
+            return f"Error: {str(e)}. Please check your API key and try again."
+    
+    async def achat_stream(self, message: str, chat_history: Optional[Union[Deque[Dict], List[Dict]]] = None) -> AsyncIterator[str]:
+        """Streaming variant of achat.
+        
+        Yields the tool result first (if a tool matched), then the LLM reply
+        token by token as Groq generates it. Joined, the chunks equal what
+        achat would have returned.
+        """
+        try:
+            tool_call, authoritative, read_only = self._classify(message)
+            if authoritative:
+                yield await tool_call()
+                return
             
-            if re.search(cost_pattern, message_lower):
-                # Try to extract pilot_id, start_date, end_date from message
-                pilot_match = re.search(r'[Pp]\d{3}', message)
-                date_match = re.findall(r'\d{4}-\d{2}-\d{2}', message)
-                if pilot_match and len(date_match) >= 2:
-                    tool_result = self._calculate_cost(pilot_match.group(), date_match[0], date_match[1])
-                    return tool_result + "\n\n" + response_text
+            messages = self._build_messages(message, chat_history)
             
-            if re.search(assign_pattern, message_lower) and re.search(project_pattern, message_lower):
-                # Extract project ID
-                project_match = re.search(r'[Pp][Rr][Jj]\d{3}', message)
-                if not project_match:
-                    project_match = re.search(r'\b(project|mission|prj)\b\s*(\d{3})', message, re.IGNORECASE)
-                if project_match:
-                    project_id = project_match.group() if 'group' not in dir(project_match) or len(project_match.groups()) == 0 else f"PRJ{project_match.group(2)}"
-                    tool_result = self._assign_to_mission(project_id)
-                    print(f"DEBUG: Assigning to mission, result: {tool_result}")
-                    return tool_result + "\n\n" + response_text
+            llm_task = asyncio.create_task(self.client.chat.completions.create(
+                **self._completion_args(messages, offer_tools=tool_call is None), stream=True
+            ))
             
-            if re.search(conflict_pattern, message_lower):
-                tool_result = self._check_conflicts()
-                print(f"DEBUG: Checking conflicts, result: {tool_result[:100]}")
-                return tool_result + "\n\n" + response_text
+            if read_only:
+                try:
+                    tool_result, stream = await asyncio.gather((tool_call or _noop)(), llm_task)
+                except Exception:
+                    llm_task.cancel()
+                    raise
+            else:
+                # Writes wait for the stream to open, as in achat
+                stream = await llm_task
+                try:
+                    tool_result = await tool_call()
+                except BaseException:
+                    await stream.close()
+                    raise
             
-            if re.search(status_pattern, message_lower):
-                # Extract pilot_id and status
-                pilot_match = re.search(r'[Pp]\d{3}', message)
-                status_match = re.search(r'(Available|Assigned|On Leave|Unavailable)', message, re.IGNORECASE)
-                if pilot_match and status_match:
-                    tool_result = self._update_pilot_status(pilot_match.group().upper(), status_match.group())
-                    return tool_result + "\n\n" + response_text
+            if tool_result is not None:
+                yield tool_result + "\n\n"
             
-            if re.search(reassign_pattern, message_lower):
-                project_match = re.search(r'[Pp][Rr][Jj]\d{3}', message)
-                if project_match:
-                    tool_result = self._handle_urgent_reassignment(project_match.group().upper())
-                    return tool_result + "\n\n" + response_text
+            # Tool calls arrive as fragments keyed by index; assemble them as they stream
+            tool_calls: Dict[int, Dict] = {}
+            content = []
+            async with stream:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    if delta.content:
+                        content.append(delta.content)
+                        yield delta.content
+                    for fragment in delta.tool_calls or ():
+                        call = tool_calls.setdefault(fragment.index, {
+                            "id": None, "type": "function", "function": {"name": "", "arguments": ""}
+                        })
+                        if fragment.id:
+                            call["id"] = fragment.id
+                        if fragment.function and fragment.function.name:
+                            call["function"]["name"] += fragment.function.name
+                        if fragment.function and fragment.function.arguments:
+                            call["function"]["arguments"] += fragment.function.arguments
             
-            return response_text
+            if tool_calls:
+                messages, tool_result = await self._run_tool_calls(
+                    messages, "".join(content) or None, [tool_calls[i] for i in sorted(tool_calls)]
+                )
+                yield tool_result + "\n\n"
+                
+                stream = await self.client.chat.completions.create(**self._completion_args(messages), stream=True)
+                async with stream:
+                    async for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            yield chunk.choices[0].delta.content
             
         except Exception as e:
-            return f"Error: {str(e)}. Please check your API key and try again."
+            yield f"Error: {str(e)}. Please check your API key and try again."
+    
+    def _completion_args(self, messages: List[Dict], offer_tools: bool = False) -> Dict[str, Any]:
+        """Keyword arguments for a chat completion request."""
+        args = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0.3,
+            "max_tokens": 2000,
+        }
+        if offer_tools:
+            args["tools"] = TOOLS
+            args["tool_choice"] = "auto"
+        return args
+    
+    async def _run_tool_calls(
+        self,
+        messages: List[Dict],
+        content: Optional[str],
+        tool_calls: List[Dict]
+    ) -> Tuple[List[Dict], str]:
+        """Run the tools the model asked for, concurrently.
+        
+        Returns the conversation extended with the assistant's tool calls and
+        one role="tool" message per result, plus the results joined for display.
+        """
+        async def run(call: Dict) -> str:
+            try:
+                kwargs = orjson.loads(call["function"]["arguments"] or "{}")
+            except orjson.JSONDecodeError:
+                kwargs = {}
+            return await self._call_tool(call["function"]["name"], **kwargs)
+        
+        results = await asyncio.gather(*(run(call) for call in tool_calls))
+        for call, result in zip(tool_calls, results):
+            logger.debug("LLM tool call %s, result: %.100s", call['function']['name'], result)
+        
+        messages = messages + [{"role": "assistant", "content": content, "tool_calls": tool_calls}]
+        messages += [
+            {"role": "tool", "tool_call_id": call["id"], "content": result}
+            for call, result in zip(tool_calls, results)
+        ]
+        return messages, "\n\n".join(results)
+    
+    def _build_messages(self, message: str, chat_history: Optional[Union[Deque[Dict], List[Dict]]]) -> List[Dict]:
+        """Assemble the system prompt, recent history and the new user message."""
+        if chat_history is None:
+            chat_history = []
+        
+        messages = [{"role": "system", "content": self.system_prompt}]
+        
+        # Add chat history (last CHAT_HISTORY_LIMIT messages for context)
+        if isinstance(chat_history, deque) and chat_history.maxlen is not None \
+                and chat_history.maxlen <= CHAT_HISTORY_LIMIT:
+            messages.extend(chat_history)
+        else:
+            messages.extend(chat_history[-CHAT_HISTORY_LIMIT:])
+        
+        # Add current user message
+        messages.append({"role": "user", "content": message})
+        return messages
+    
+    def _classify(self, message: str) -> Tuple[Optional[Callable[[], Awaitable[Optional[str]]]], bool, bool]:
+        """Pick the tool call(s) a message asks for without running them.
+        
+        Returns a callable that runs the candidates in priority order (or None
+        when no tool applies), whether its result fully answers the message
+        so the LLM call can be skipped, and whether every candidate is
+        read-only, so it is safe to run before the LLM call has succeeded.
+        """
+        # Check if the message asks for a specific operation (simple pattern matching)
+        message_lower = message.lower()
+        intents = _detect_intents(message_lower)
+        
+        candidates: List[_Candidate] = []
+        
+        # Pattern matching for tool calls
+        if 'pilot' in intents and _PATTERNS['pilot'].search(message_lower):
+            candidates.append(_Candidate(
+                "Found pilot query", partial(self._query_pilots, message, message_lower),
+                "no pilots found", authoritative=False, read_only=True
+            ))
+        
+        if 'drone' in intents and _PATTERNS['drone'].search(message_lower):
+            candidates.append(_Candidate(
+                "Found drone query", partial(self._query_drones, message, message_lower),
+                "no drones found", authoritative=False, read_only=True
+            ))
+        
+        if 'cost' in intents:
+            # Try to extract pilot_id, start_date, end_date from message
+            pilot_match = _PILOT_ID_RE.search(message)
+            date_match = _DATE_RE.findall(message)
+            if pilot_match and len(date_match) >= 2:
+                candidates.append(_Candidate("Calculating cost", partial(
+                    self._calculate_cost, pilot_match.group(), date_match[0], date_match[1]
+                ), None, authoritative=False, read_only=True))
+        
+        if (
+            {'assign', 'project'} <= intents
+            and _PATTERNS['assign'].search(message_lower)
+            and _PATTERNS['project'].search(message_lower)
+        ):
+            # Extract project ID
+            project_match = _PRJ_RE.search(message)
+            if not project_match:
+                project_match = _PROJECT_NUM_RE.search(message)
+            if project_match:
+                project_id = project_match.group() if 'group' not in dir(project_match) or len(project_match.groups()) == 0 else f"PRJ{project_match.group(2)}"
+                candidates.append(_Candidate(
+                    "Assigning to mission", partial(self._assign_to_mission, project_id),
+                    None, authoritative=True, read_only=False
+                ))
+        
+        if 'conflict' in intents:
+            candidates.append(_Candidate(
+                "Checking conflicts", self._check_conflicts, None, authoritative=True, read_only=True
+            ))
+        
+        if 'status' in intents and _PATTERNS['status'].search(message_lower):
+            # Extract pilot_id and status
+            pilot_match = _PILOT_ID_RE.search(message)
+            status_match = _STATUS_RE.search(message)
+            if pilot_match and status_match:
+                candidates.append(_Candidate("Updating pilot status", partial(
+                    self._update_pilot_status, pilot_match.group().upper(), status_match.group()
+                ), None, authoritative=True, read_only=False))
+        
+        if 'reassign' in intents:
+            project_match = _PRJ_RE.search(message)
+            if project_match:
+                candidates.append(_Candidate("Urgent reassignment", partial(
+                    self._handle_urgent_reassignment, project_match.group().upper()
+                ), None, authoritative=True, read_only=False))
+        
+        if not candidates:
+            return None, False, True
+        
+        # Only a lone, unambiguous command skips the LLM; anything longer or
+        # phrased as a question still gets an explanation
+        authoritative = (
+            len(candidates) == 1
+            and candidates[0].authoritative
+            and '?' not in message
+            and len(message.split()) <= _FAST_PATH_MAX_WORDS
+        )
+        read_only = all(candidate.read_only for candidate in candidates)
+        return partial(self._run_candidates, candidates), authoritative, read_only
+    
+    async def _run_candidates(self, candidates: List[_Candidate]) -> Optional[str]:
+        """Return the first usable result from the classified tool calls, in order.
+        
+        Read-only candidates all start at once so their Sheets I/O overlaps;
+        write tools only run once every candidate before them came back empty.
+        """
+        started = [
+            asyncio.create_task(candidate.call()) if candidate.read_only else None
+            for candidate in candidates
+        ]
+        try:
+            for candidate, task in zip(candidates, started):
+                tool_result = await task if task is not None else await candidate.call()
+                logger.debug("%s, result: %.100s", candidate.label, tool_result)
+                if candidate.empty_marker is None or candidate.empty_marker not in tool_result.lower():
+                    return tool_result
+            return None
+        finally:
+            for task in started:
+                if task is not None and not task.done():
+                    task.cancel()
+
+
+class DroneOperationsAgent(AsyncDroneOperationsAgent):
+    """AI agent for coordinating drone operations (blocking API).
+    
+    Runs the async agent on a background event loop shared by all instances.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self._loop = _event_loop()
+    
+    def chat(self, message: str, chat_history: Optional[Union[Deque[Dict], List[Dict]]] = None) -> str:
+        """Chat with the agent (blocking wrapper around achat for sync callers)."""
+        future = asyncio.run_coroutine_threadsafe(self.achat(message, chat_history), self._loop)
+        return future.result()
+    
+    def chat_stream(self, message: str, chat_history: Optional[Union[Deque[Dict], List[Dict]]] = None) -> Iterator[str]:
+        """Chat with the agent, yielding the reply in chunks (sync wrapper around achat_stream)."""
+        agen = self.achat_stream(message, chat_history)
+        try:
+            while True:
+                try:
+                    yield asyncio.run_coroutine_threadsafe(agen.__anext__(), self._loop).result()
+                except StopAsyncIteration:
+                    return
+        finally:
+            asyncio.run_coroutine_threadsafe(agen.aclose(), self._loop).result()
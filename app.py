@@ -1,211 +1,230 @@
 """Streamlit web interface for Drone Operations Coordinator AI Agent."""
 import streamlit as st
 import os
-import json
+import re
+from collections import deque
+from functools import partial
 from dotenv import load_dotenv
 
-# Load environment variables before importing agent
-load_dotenv(override=True)  # override=True ensures .env values take precedence
+# orjson is much faster at parsing the agent replies re-formatted on every
+# rerun; fall back to the stdlib if it isn't installed
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# Load environment variables before importing agent (once per process,
+# not on every rerun)
+@st.cache_resource(show_spinner=False)
+def _load_env():
+    return load_dotenv(override=True)  # override=True ensures .env values take precedence
+
+_load_env()
+
+_NON_SPACE = re.compile(r'\S')
 
 def format_response(response_text):
-    """Format response as JSON or markdown depending on content."""
+    """Format response as JSON or markdown depending on content.
+    
+    Structured (dict) messages are returned as-is; strings are parsed once
+    and cached per message text, since every rerun re-formats the whole history.
+    """
+    if isinstance(response_text, dict):
+        return response_text
+    return _parse_response(response_text)
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def _parse_response(response_text):
+    """Parse a message string into response data (see format_response)."""
     if not isinstance(response_text, str):
         return {"type": "text", "data": str(response_text)}
     
-    # Check if it looks like JSON (starts with { or [)
-    response_text = response_text.strip()
-    if response_text.startswith('{') or response_text.startswith('['):
+    # Check if it looks like JSON (starts with { or [), peeking at the first
+    # non-space character rather than stripping a copy of the whole message
+    first = _NON_SPACE.search(response_text)
+    if first is None:
+        return {"type": "text", "data": ""}
+    if first.start():
+        # Leading whitespace would turn markdown into a code block
+        response_text = response_text[first.start():]
+    
+    if first.group() in '{[':
         try:
             # Try to parse as JSON
-            data = json.loads(response_text)
+            data = json_loads(response_text)
             return data
-        except json.JSONDecodeError:
+        except ValueError:  # JSONDecodeError (stdlib and orjson) subclasses ValueError
             # Return as plain text if not valid JSON
             return {"type": "text", "data": response_text}
     else:
         # Not JSON, return as plain text
         return {"type": "text", "data": response_text}
 
-def display_response(response_data):
-    """Display response in a beautiful, frontend-friendly way."""
-    if isinstance(response_data, dict):
-        response_type = response_data.get("type", "unknown")
-        
-        if response_type == "text":
-            # Plain text display
-            st.markdown(response_data.get('data', ''))
-            st.divider()
-        
-        elif response_type == "pilots":
-            # Pilot list display
-            count = response_data.get('count', 0)
-            data = response_data.get('data', [])
-            message = response_data.get('message', f'Found {count} pilot(s)')
-            
-            col1, col2 = st.columns([0.7, 0.3])
-            with col1:
-                st.subheader("🧑‍✈️ Available Pilots")
-            with col2:
-                st.metric("Count", count, delta=None)
-            
-            if data:
-                st.dataframe(data, use_container_width=True, hide_index=True)
-            else:
-                st.info(message)
-            st.divider()
-        
-        elif response_type == "drones":
-            # Drone list display
-            count = response_data.get('count', 0)
-            data = response_data.get('data', [])
-            message = response_data.get('message', f'Found {count} drone(s)')
-            
-            col1, col2 = st.columns([0.7, 0.3])
-            with col1:
-                st.subheader("✈️ Available Drones")
-            with col2:
-                st.metric("Count", count, delta=None)
-            
-            if data:
-                st.dataframe(data, use_container_width=True, hide_index=True)
-            else:
-                st.info(message)
-            st.divider()
-        
-        elif response_type == "missions":
-            # Missions list display
-            count = response_data.get('count', 0)
-            data = response_data.get('data', [])
-            message = response_data.get('message', f'Found {count} mission(s)')
-            
-            col1, col2 = st.columns([0.7, 0.3])
-            with col1:
-                st.subheader("📋 Active Missions")
-            with col2:
-                st.metric("Count", count, delta=None)
-            
-            if data:
-                st.dataframe(data, use_container_width=True, hide_index=True)
-            else:
-                st.info(message)
-            st.divider()
-        
-        elif response_type == "assignment":
-            # Assignment display with nice visual feedback
-            status = response_data.get('status', 'unknown')
-            pilot_id = response_data.get('pilot_id', 'N/A')
-            drone_id = response_data.get('drone_id', 'N/A')
-            project_id = response_data.get('project_id', 'N/A')
-            message = response_data.get('message', 'Assignment processed')
-            
-            if status == 'success':
-                st.success("✅ Assignment Successful")
-                
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Project", project_id)
-                with col2:
-                    st.metric("Pilot Assigned", pilot_id)
-                with col3:
-                    st.metric("Drone Assigned", drone_id)
-                
-                st.markdown(f"**Status**: {message}")
-            else:
-                st.error("❌ Assignment Failed")
-                error = response_data.get('error', 'Unknown error')
-                st.markdown(f"**Error**: {error}")
-            st.divider()
+def table_data(response_data):
+    """Rows to show for a list response: the DataFrame itself for sidebar
+    results, or the parsed JSON 'data' for agent replies."""
+    if 'df' in response_data:
+        return response_data['df']
+    return response_data.get('data', [])
+
+def _card(*fields):
+    """Bordered card with one "**label**: value" line per field.
+    
+    Used for ID/name fields instead of st.columns + st.metric, which costs
+    several widgets per field for no numeric benefit.
+    """
+    with st.container(border=True):
+        st.markdown("  \n".join(f"**{label}**: {value}" for label, value in fields))
+
+def _render_text(response_data):
+    """Plain text display."""
+    st.markdown(response_data.get('data', ''))
+    st.divider()
+
+# Titles and nouns for the list response types, all drawn by _render_entity_list
+_ENTITY_META = {
+    "pilots": ("🧑‍✈️ Available Pilots", "pilot"),
+    "drones": ("✈️ Available Drones", "drone"),
+    "missions": ("📋 Active Missions", "mission"),
+}
+
+def _render_entity_list(response_data, title, entity):
+    """Pilot/drone/mission list display: header, count and table."""
+    count = response_data.get('count', 0)
+    data = table_data(response_data)
+    message = response_data.get('message', f'Found {count} {entity}(s)')
+    
+    st.subheader(f"{title} ({count})")
+    
+    if len(data) > 0:
+        st.dataframe(data, use_container_width=True, hide_index=True)
+    else:
+        st.info(message)
+    st.divider()
+
+def _render_assignment(response_data):
+    """Assignment display with nice visual feedback."""
+    status = response_data.get('status', 'unknown')
+    pilot_id = response_data.get('pilot_id', 'N/A')
+    drone_id = response_data.get('drone_id', 'N/A')
+    project_id = response_data.get('project_id', 'N/A')
+    message = response_data.get('message', 'Assignment processed')
+    
+    if status == 'success':
+        st.success("✅ Assignment Successful")
         
-        elif response_type == "cost_calculation":
-            # Cost display with beautiful metrics
-            pilot_name = response_data.get('pilot_name', 'Unknown')
-            start_date = response_data.get('start_date', 'N/A')
-            end_date = response_data.get('end_date', 'N/A')
-            total_cost = response_data.get('total_cost_inr', 0)
-            currency = response_data.get('currency', 'INR')
-            
-            st.subheader("💰 Cost Calculation")
-            
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Pilot", pilot_name)
-            with col2:
-                st.metric("Duration", f"{start_date} → {end_date}")
-            with col3:
-                st.metric("Total Cost", f"₹{total_cost:,.2f}", delta=f"{currency}")
-            st.divider()
+        _card(("Project", project_id), ("Pilot Assigned", pilot_id), ("Drone Assigned", drone_id))
         
-        elif response_type == "pilot_status_update":
-            # Status update display
-            status = response_data.get('status', 'unknown')
-            pilot_id = response_data.get('pilot_id', 'N/A')
-            new_status = response_data.get('new_status', 'N/A')
-            message = response_data.get('message', 'Status update processed')
-            
-            if status == 'success':
-                st.success("✅ Status Updated")
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.metric("Pilot ID", pilot_id)
-                with col2:
-                    st.metric("New Status", new_status)
-                
-                st.markdown(f"**Update**: {message}")
-            else:
-                st.error("❌ Status Update Failed")
-                valid_statuses = response_data.get('valid_statuses', [])
-                st.markdown(f"**Pilot ID**: {pilot_id}")
-                if valid_statuses:
-                    st.markdown(f"**Valid statuses**: {', '.join(valid_statuses)}")
-            st.divider()
+        st.markdown(f"**Status**: {message}")
+    else:
+        st.error("❌ Assignment Failed")
+        error = response_data.get('error', 'Unknown error')
+        st.markdown(f"**Error**: {error}")
+    st.divider()
+
+def _render_cost_calculation(response_data):
+    """Cost display with beautiful metrics."""
+    pilot_name = response_data.get('pilot_name', 'Unknown')
+    start_date = response_data.get('start_date', 'N/A')
+    end_date = response_data.get('end_date', 'N/A')
+    total_cost = response_data.get('total_cost_inr', 0)
+    currency = response_data.get('currency', 'INR')
+    
+    st.subheader("💰 Cost Calculation")
+    
+    _card(("Pilot", pilot_name), ("Duration", f"{start_date} → {end_date}"))
+    st.metric("Total Cost", f"₹{total_cost:,.2f}", delta=f"{currency}")
+    st.divider()
+
+def _render_pilot_status_update(response_data):
+    """Status update display."""
+    status = response_data.get('status', 'unknown')
+    pilot_id = response_data.get('pilot_id', 'N/A')
+    new_status = response_data.get('new_status', 'N/A')
+    message = response_data.get('message', 'Status update processed')
+    
+    if status == 'success':
+        st.success("✅ Status Updated")
         
-        elif response_type == "conflict_check":
-            # Conflict detection display
-            total_conflicts = response_data.get('total_conflicts', 0)
-            conflicts = response_data.get('conflicts', {})
-            message = response_data.get('message', '')
-            
-            if total_conflicts > 0:
-                st.warning(f"⚠️ {total_conflicts} Conflict(s) Detected")
-            else:
-                st.success("✅ No Conflicts Found")
-            
-            st.metric("Total Conflicts", total_conflicts)
-            
-            if conflicts:
-                with st.expander("📋 View Conflict Details"):
-                    for conflict_id, details in conflicts.items():
-                        st.markdown(f"**{conflict_id}**: {details}")
-            
-            if message:
-                st.markdown(f"**Summary**: {message}")
-            st.divider()
+        _card(("Pilot ID", pilot_id), ("New Status", new_status))
         
-        else:
-            # Fallback for unknown types
-            st.subheader("📊 Response Data")
-            
-            # Extract message if available
-            message = response_data.get('message', '')
-            if message:
-                st.markdown(f"**{message}**")
-            
-            # Show key metrics
-            if 'count' in response_data:
-                st.metric("Count", response_data['count'])
-            
-            # Show data in expandable section
-            if 'data' in response_data:
-                with st.expander("📄 View Raw Data"):
-                    st.json(response_data['data'])
-            st.divider()
+        st.markdown(f"**Update**: {message}")
     else:
-        st.markdown(response_text)
+        st.error("❌ Status Update Failed")
+        valid_statuses = response_data.get('valid_statuses', [])
+        st.markdown(f"**Pilot ID**: {pilot_id}")
+        if valid_statuses:
+            st.markdown(f"**Valid statuses**: {', '.join(valid_statuses)}")
+    st.divider()
+
+def _render_conflict_check(response_data):
+    """Conflict detection display."""
+    total_conflicts = response_data.get('total_conflicts', 0)
+    conflicts = response_data.get('conflicts', {})
+    message = response_data.get('message', '')
+    
+    if total_conflicts > 0:
+        st.warning(f"⚠️ {total_conflicts} Conflict(s) Detected")
+    else:
+        st.success("✅ No Conflicts Found")
+    
+    st.metric("Total Conflicts", total_conflicts)
+    
+    if conflicts:
+        with st.expander("📋 View Conflict Details"):
+            for conflict_id, details in conflicts.items():
+                st.markdown(f"**{conflict_id}**: {details}")
+    
+    if message:
+        st.markdown(f"**Summary**: {message}")
+    st.divider()
+
+def _render_fallback(response_data):
+    """Fallback for unknown types."""
+    st.subheader("📊 Response Data")
+    
+    # Extract message if available
+    message = response_data.get('message', '')
+    if message:
+        st.markdown(f"**{message}**")
+    
+    # Show key metrics
+    if 'count' in response_data:
+        st.metric("Count", response_data['count'])
+    
+    # Show data in expandable section
+    if 'data' in response_data:
+        with st.expander("📄 View Raw Data"):
+            st.json(response_data['data'])
+    st.divider()
+
+# Response type -> renderer, looked up once per message instead of an if/elif chain
+_RENDERERS = {
+    "text": _render_text,
+    **{
+        response_type: partial(_render_entity_list, title=title, entity=entity)
+        for response_type, (title, entity) in _ENTITY_META.items()
+    },
+    "assignment": _render_assignment,
+    "cost_calculation": _render_cost_calculation,
+    "pilot_status_update": _render_pilot_status_update,
+    "conflict_check": _render_conflict_check,
+}
+
+def display_response(response_data):
+    """Display response in a beautiful, frontend-friendly way."""
+    if isinstance(response_data, dict):
+        _RENDERERS.get(response_data.get("type", "unknown"), _render_fallback)(response_data)
+    else:
+        st.markdown(str(response_data))
+
+# Chat messages kept per session; the agent's own limit replaces this
+# default when it imports
+CHAT_HISTORY_LIMIT = 10
 
 # Try to import the agent, handle import errors gracefully
 try:
-    from agent import DroneOperationsAgent
+    from agent import DroneOperationsAgent, CHAT_HISTORY_LIMIT
     AGENT_AVAILABLE = True
 except ImportError as e:
     AGENT_AVAILABLE = False
@@ -214,6 +233,24 @@ except Exception as e:
     AGENT_AVAILABLE = False
     IMPORT_ERROR = str(e)
 
+@st.cache_resource(show_spinner=False)
+def _get_agent():
+    """One agent shared by every session, so new tabs and hard refreshes
+    skip re-authenticating with Groq and Google Sheets."""
+    return DroneOperationsAgent()
+
+# Sidebar quick action labels (None is the idle selection)
+QUICK_ACTION_LABELS = {
+    None: "—",
+    "conflicts": "🔍 Check All Conflicts",
+    "pilots": "👥 View Available Pilots",
+    "drones": "✈️ View Available Drones",
+    "missions": "📋 View Active Missions",
+}
+
+# Sidebar tables are stored as DataFrames in session state, capped at this many rows
+SIDEBAR_ROW_LIMIT = 5000
+
 # Page config
 st.set_page_config(
     page_title="Skylark Drones Operations Coordinator",
@@ -228,7 +265,7 @@ if "agent" not in st.session_state:
         st.session_state.error = f"Failed to import agent module: {IMPORT_ERROR}\n\nPlease install dependencies: pip install langchain-groq"
     else:
         try:
-            st.session_state.agent = DroneOperationsAgent()
+            st.session_state.agent = _get_agent()
             st.session_state.initialized = True
         except Exception as e:
             st.session_state.initialized = False
@@ -238,7 +275,8 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 
 if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
+    # Bounded so the history the agent sends with each turn never needs trimming
+    st.session_state.chat_history = deque(maxlen=CHAT_HISTORY_LIMIT)
 
 # Header
 st.title("🚁 Skylark Drones Operations Coordinator")
@@ -248,25 +286,27 @@ st.markdown("AI-powered agent for managing drone operations, pilot assignments,
 with st.sidebar:
     st.header("Quick Actions")
     
-    action = None
-    
-    if st.button("🔍 Check All Conflicts"):
-        action = "conflicts"
-    
-    if st.button("👥 View Available Pilots"):
-        action = "pilots"
+    # One radio instead of four buttons; the callback hands the choice to
+    # this run and resets the radio so the action fires once per selection
+    def _queue_action():
+        st.session_state.pending_action = st.session_state.quick_action
+        st.session_state.quick_action = None
     
-    if st.button("✈️ View Available Drones"):
-        action = "drones"
-    
-    if st.button("📋 View Active Missions"):
-        action = "missions"
+    st.radio(
+        "Quick Actions",
+        options=[None, "conflicts", "pilots", "drones", "missions"],
+        format_func=QUICK_ACTION_LABELS.get,
+        key="quick_action",
+        on_change=_queue_action,
+        label_visibility="collapsed"
+    )
+    action = st.session_state.pop("pending_action", None)
     
     st.divider()
     
     if st.button("🗑️ Clear Chat History"):
         st.session_state.messages = []
-        st.session_state.chat_history = []
+        st.session_state.chat_history.clear()
 
 # Process sidebar actions
 if "action" in locals() and action:
@@ -280,86 +320,53 @@ if "action" in locals() and action:
                 })
             elif action == "pilots":
                 pilots = st.session_state.agent.roster_manager.get_available_pilots()
-                result = json.dumps({
+                result = {
                     "type": "pilots",
                     "count": len(pilots),
-                    "data": pilots.to_dict(orient='records'),
+                    "df": pilots.head(SIDEBAR_ROW_LIMIT),
                     "message": f"Found {len(pilots)} available pilot(s)"
-                })
+                }
                 st.session_state.messages.append({
                     "role": "assistant",
                     "content": result
                 })
             elif action == "drones":
                 drones = st.session_state.agent.inventory_manager.get_available_drones()
-                result = json.dumps({
+                result = {
                     "type": "drones",
                     "count": len(drones),
-                    "data": drones.to_dict(orient='records'),
+                    "df": drones.head(SIDEBAR_ROW_LIMIT),
                     "message": f"Found {len(drones)} available drone(s)"
-                })
+                }
                 st.session_state.messages.append({
                     "role": "assistant",
                     "content": result
                 })
             elif action == "missions":
                 missions = st.session_state.agent.assignment_tracker.get_active_missions()
-                result = json.dumps({
+                result = {
                     "type": "missions",
                     "count": len(missions),
-                    "data": missions.to_dict(orient='records'),
+                    "df": missions.head(SIDEBAR_ROW_LIMIT),
                     "message": f"Found {len(missions)} active mission(s)"
-                })
+                }
                 st.session_state.messages.append({
                     "role": "assistant",
                     "content": result
                 })
         st.rerun()
 
-# Main content area
-if not st.session_state.initialized:
-    error_msg = st.session_state.get('error', 'Unknown error')
-    st.error(f"❌ Failed to initialize agent: {error_msg}")
-    
-    if not AGENT_AVAILABLE:
-        st.warning("""
-        **Missing Dependencies:**
-        
-        Please install the required packages:
-        ```bash
-        pip install groq
-        ```
-        
-        Or install all dependencies:
-        ```bash
-        pip install -r requirements.txt
-        ```
-        """)
-    else:
-        st.info("""
-        **Setup Instructions:**
-        1. Make sure you have set up your `.env` file with:
-           - `GROQ_API_KEY` - Your Groq API key (get from https://console.groq.com/)
-           - `GOOGLE_SHEETS_CREDENTIALS_PATH` - Path to Google Sheets credentials JSON
-           - `PILOT_ROSTER_SHEET_ID`, `DRONE_FLEET_SHEET_ID`, `MISSIONS_SHEET_ID` - Your Google Sheet IDs
-        
-        2. If you don't have Google Sheets set up yet, the agent will fall back to local CSV files.
-        
-        3. For Google Sheets setup:
-           - Create a Google Cloud Project
-           - Enable Google Sheets API
-           - Create OAuth 2.0 credentials
-           - Upload your CSV files to Google Sheets
-        """)
-else:
-    # Chat interface
-    st.subheader("💬 Chat with Operations Coordinator")
-    
+# Chat history and input live in a fragment so a new message only reruns
+# this part of the page, not the sidebar and setup code above
+@st.fragment
+def chat_panel():
+    """Render the message history and handle new chat input."""
     # Display chat messages
     for message in st.session_state.messages:
         with st.chat_message(message["role"]):
             if message["role"] == "assistant":
-                # Try to format assistant responses as structured data
+                # Sidebar results are stored already structured; agent replies
+                # are strings to format as structured data where possible
                 response_data = format_response(message["content"])
                 if isinstance(response_data, dict) and response_data.get("type"):
                     display_response(response_data)
@@ -382,13 +389,15 @@ else:
             "content": prompt
         })
         
-        # Get agent response
+        # Get agent response, rendering tokens as they stream in
         try:
-            with st.spinner("Thinking..."):
-                response = st.session_state.agent.chat(
+            with st.chat_message("user"):
+                st.markdown(prompt)
+            with st.chat_message("assistant"):
+                response = st.write_stream(st.session_state.agent.chat_stream(
                     prompt,
                     st.session_state.chat_history
-                )
+                ))
             
             # Add assistant response to history
             st.session_state.messages.append({
@@ -401,7 +410,7 @@ else:
             })
             
             # Rerun to display new messages
-            st.rerun()
+            st.rerun(scope="fragment")
         
         except Exception as e:
             error_msg = f"Error: {str(e)}"
@@ -409,4 +418,44 @@ else:
                 "role": "assistant",
                 "content": error_msg
             })
-            st.rerun()
+            st.rerun(scope="fragment")
+
+# Main content area
+if not st.session_state.initialized:
+    error_msg = st.session_state.get('error', 'Unknown error')
+    st.error(f"❌ Failed to initialize agent: {error_msg}")
+    
+    if not AGENT_AVAILABLE:
+        st.warning("""
+        **Missing Dependencies:**
+        
+        Please install the required packages:
+        ```bash
+        pip install groq
+        ```
+        
+        Or install all dependencies:
+        ```bash
+        pip install -r requirements.txt
+        ```
+        """)
+    else:
+        st.info("""
+        **Setup Instructions:**
+        1. Make sure you have set up your `.env` file with:
+           - `GROQ_API_KEY` - Your Groq API key (get from https://console.groq.com/)
+           - `GOOGLE_SHEETS_CREDENTIALS_PATH` - Path to Google Sheets credentials JSON
+           - `PILOT_ROSTER_SHEET_ID`, `DRONE_FLEET_SHEET_ID`, `MISSIONS_SHEET_ID` - Your Google Sheet IDs
+        
+        2. If you don't have Google Sheets set up yet, the agent will fall back to local CSV files.
+        
+        3. For Google Sheets setup:
+           - Create a Google Cloud Project
+           - Enable Google Sheets API
+           - Create OAuth 2.0 credentials
+           - Upload your CSV files to Google Sheets
+        """)
+else:
+    # Chat interface
+    st.subheader("💬 Chat with Operations Coordinator")
+    chat_panel()
@@ -1,4 +1,6 @@
 """Assignment tracking and matching logic."""
+import time
+import numpy as np
 import pandas as pd
 from typing import Optional, Dict, Tuple
 from utils import dates_overlap, calculate_mission_duration
@@ -6,6 +8,19 @@ from sheets_sync import GoogleSheetsSync
 from roster_manager import RosterManager
 from inventory_manager import InventoryManager
 
+# Drone capability needed for each pilot skill (simplified mapping)
+_SKILL_TO_CAPABILITY = {
+    'Thermal': 'Thermal',
+    'Mapping': 'RGB',
+    'Survey': 'RGB',
+    'Inspection': 'RGB',
+    'LiDAR': 'LiDAR'
+}
+_DEFAULT_CAPABILITIES = 'RGB'
+
+# Missions data younger than this is reused instead of re-read from Sheets
+_REFRESH_TTL = 2.0  # seconds
+
 
 class AssignmentTracker:
     """Track and manage pilot/drone assignments."""
@@ -19,39 +34,59 @@ class AssignmentTracker:
         self.sheets_sync = sheets_sync
         self.roster_manager = roster_manager
         self.inventory_manager = inventory_manager
-        self._missions = None
+        # (missions frame, project_id -> row position), replaced as one value
+        self._missions: Optional[Tuple[pd.DataFrame, Dict[str, int]]] = None
+        self._last_refresh = 0.0
         self._refresh_missions()
     
     def _refresh_missions(self):
-        """Refresh missions data from Google Sheets."""
-        self._missions = self.sheets_sync.get_missions()
+        """Refresh missions data from Google Sheets (at most once per _REFRESH_TTL)."""
+        if time.monotonic() - self._last_refresh < _REFRESH_TTL:
+            return
+        
+        # Build a local frame and index and publish them as one tuple at the
+        # end, so concurrent readers never pair a frame with another's index
+        missions = self.sheets_sync.get_missions()
         
         # Handle column name variations
-        if 'mission_id' in self._missions.columns and 'project_id' not in self._missions.columns:
-            self._missions['project_id'] = self._missions['mission_id']
-        
-        # Ensure required columns exist
-        if 'assigned_pilot' not in self._missions.columns:
-            self._missions['assigned_pilot'] = '-'
-        if 'assigned_drone' not in self._missions.columns:
-            self._missions['assigned_drone'] = '-'
-        if 'status' not in self._missions.columns:
-            self._missions['status'] = 'Pending'
-        if 'project_id' not in self._missions.columns:
+        if 'mission_id' in missions.columns and 'project_id' not in missions.columns:
+            missions['project_id'] = missions['mission_id']
+        
+        # Ensure required columns exist (added in a single assign)
+        defaults = {}
+        if 'assigned_pilot' not in missions.columns:
+            defaults['assigned_pilot'] = '-'
+        if 'assigned_drone' not in missions.columns:
+            defaults['assigned_drone'] = '-'
+        if 'status' not in missions.columns:
+            defaults['status'] = 'Pending'
+        if 'project_id' not in missions.columns:
             # If no ID column exists, create one from index
-            self._missions['project_id'] = [f"PROJ{i:03d}" for i in range(len(self._missions))]
+            defaults['project_id'] = np.char.mod('PROJ%03d', np.arange(len(missions)))
+        if defaults:
+            missions = missions.assign(**defaults)
+        
+        # project_id -> row position, first occurrence wins like the old mask lookup
+        mission_index = {}
+        for i, project_id in enumerate(missions['project_id'].to_numpy()):
+            mission_index.setdefault(project_id, i)
+        
+        self._missions = (missions, mission_index)
+        self._last_refresh = time.monotonic()
     
     def get_mission_by_id(self, project_id: str) -> Optional[pd.Series]:
         """Get mission by project ID."""
         self._refresh_missions()
-        matches = self._missions[self._missions['project_id'] == project_id]
-        return matches.iloc[0] if len(matches) > 0 else None
+        missions, mission_index = self._missions
+        idx = mission_index.get(project_id)
+        return None if idx is None else missions.iloc[idx]
     
     def get_active_missions(self) -> pd.DataFrame:
         """Get all active missions."""
         self._refresh_missions()
         # In a full implementation, filter by date ranges
-        return self._missions
+        missions, _ = self._missions
+        return missions
     
     def match_pilot_to_mission(self, project_id: str) -> Optional[str]:
         """Find best matching pilot for a mission."""
@@ -81,26 +116,15 @@ class AssignmentTracker:
             return None
         
         # Determine required capabilities from required skills
-        # This is a simplified mapping
-        skill_to_capability = {
-            'Thermal': 'Thermal',
-            'Mapping': 'RGB',
-            'Survey': 'RGB',
-            'Inspection': 'RGB',
-            'LiDAR': 'LiDAR'
-        }
-        
-        required_capabilities = []
-        for skill in mission['required_skills'].split(','):
-            skill = skill.strip()
-            if skill in skill_to_capability:
-                required_capabilities.append(skill_to_capability[skill])
-        
-        if not required_capabilities:
-            required_capabilities = ['RGB']  # Default
+        # (deduplicated, in the order the skills are listed)
+        required_capabilities = ','.join(dict.fromkeys(
+            _SKILL_TO_CAPABILITY[skill]
+            for skill in map(str.strip, mission['required_skills'].split(','))
+            if skill in _SKILL_TO_CAPABILITY
+        )) or _DEFAULT_CAPABILITIES
         
         matching_drones = self.inventory_manager.find_matching_drones(
-            required_capabilities=','.join(required_capabilities),
+            required_capabilities=required_capabilities,
             location=mission['location'],
             weather_forecast=mission['weather_forecast']
         )
@@ -111,52 +135,6 @@ class AssignmentTracker:
         # Return first matching drone
         return matching_drones.iloc[0]['drone_id']
     
-    def assign_pilot_to_mission(
-        self, 
-        pilot_id: str, 
-        project_id: str
-    ) -> bool:
-        """Assign pilot to mission."""
-        mission = self.get_mission_by_id(project_id)
-        if mission is None:
-            return False
-        
-        # Check availability
-        if not self.roster_manager.is_pilot_available(
-            pilot_id, 
-            mission['start_date'], 
-            mission['end_date']
-        ):
-            return False
-        
-        # Update pilot status
-        return self.roster_manager.update_pilot_status(
-            pilot_id, 
-            'Assigned', 
-            project_id
-        )
-    
-    def assign_drone_to_mission(
-        self, 
-        drone_id: str, 
-        project_id: str
-    ) -> bool:
-        """Assign drone to mission."""
-        mission = self.get_mission_by_id(project_id)
-        if mission is None:
-            return False
-        
-        # Check availability
-        if not self.inventory_manager.is_drone_available(drone_id):
-            return False
-        
-        # Update drone status
-        return self.inventory_manager.update_drone_status(
-            drone_id, 
-            'Assigned', 
-            project_id
-        )
-    
     def create_assignment(
         self, 
         project_id: str,
@@ -179,18 +157,24 @@ class AssignmentTracker:
             if not drone_id:
                 return {'success': False, 'error': 'No suitable drone found'}
         
-        # Assign pilot
-        pilot_assigned = self.assign_pilot_to_mission(pilot_id, project_id)
-        if not pilot_assigned:
+        # Check both sides before writing anything, so an unavailable drone
+        # no longer costs a pilot write plus a rollback write
+        if not self.roster_manager.is_pilot_available(
+            pilot_id, 
+            mission['start_date'], 
+            mission['end_date']
+        ):
             return {'success': False, 'error': 'Failed to assign pilot'}
         
-        # Assign drone
-        drone_assigned = self.assign_drone_to_mission(drone_id, project_id)
-        if not drone_assigned:
-            # Rollback pilot assignment
-            self.roster_manager.update_pilot_status(pilot_id, 'Available', None)
+        if not self.inventory_manager.is_drone_available(drone_id):
             return {'success': False, 'error': 'Failed to assign drone'}
         
+        # Both writes are queued and sent when the batch ends: one request
+        # per sheet, each with the row's status and assignment cells
+        with self.sheets_sync.batch():
+            self.roster_manager.update_pilot_status(pilot_id, 'Assigned', project_id)
+            self.inventory_manager.update_drone_status(drone_id, 'Assigned', project_id)
+        
         return {
             'success': True,
             'pilot_id': pilot_id,
@@ -208,26 +192,21 @@ class AssignmentTracker:
         if mission is None:
             return {'success': False, 'error': 'Mission not found'}
         
-        # Get current assignments
-        current_pilots = self.roster_manager.get_current_assignments()
-        current_drones = self.inventory_manager.get_deployed_drones()
-        
-        # Find if mission already has assignments
-        assigned_pilot = current_pilots[
-            current_pilots['current_assignment'] == project_id
-        ]
-        assigned_drone = current_drones[
-            current_drones['current_assignment'] == project_id
-        ]
-        
-        # Free up current assignments
-        if len(assigned_pilot) > 0:
-            old_pilot_id = assigned_pilot.iloc[0]['pilot_id']
-            self.roster_manager.update_pilot_status(old_pilot_id, 'Available', None)
-        
-        if len(assigned_drone) > 0:
-            old_drone_id = assigned_drone.iloc[0]['drone_id']
-            self.inventory_manager.update_drone_status(old_drone_id, 'Available', None)
-        
-        # Create new assignment
-        return self.create_assignment(project_id)
+        # One batch for the whole reassignment. Matching must see the freed
+        # pilot and drone, so reading a sheet back sends its queued release
+        # write first; the batch saves the repeated reads, and the new
+        # assignment's cells go out as one request per sheet at the end
+        with self.sheets_sync.batch():
+            # Find if mission already has assignments
+            assigned_pilots = self.roster_manager.get_pilots_for_assignment(project_id)
+            assigned_drones = self.inventory_manager.get_drones_for_assignment(project_id)
+            
+            # Free up current assignments
+            if assigned_pilots:
+                self.roster_manager.update_pilot_status(assigned_pilots[0], 'Available', None)
+            
+            if assigned_drones:
+                self.inventory_manager.update_drone_status(assigned_drones[0], 'Available', None)
+            
+            # Create new assignment
+            return self.create_assignment(project_id)
@@ -1,15 +1,127 @@
 """Conflict detection logic."""
+import logging
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, NamedTuple, Callable
 from utils import (
-    dates_overlap, skills_match, certifications_match,
-    is_weather_compatible, calculate_pilot_cost
+    parse_skills, parse_certifications, parse_date_column,
+    dates_overlap_mask, mission_duration_column, weather_compatible_mask
 )
 from sheets_sync import GoogleSheetsSync
 from roster_manager import RosterManager
 from inventory_manager import InventoryManager
 from assignment_tracker import AssignmentTracker
 
+logger = logging.getLogger(__name__)
+
+
+def _first_per(df: pd.DataFrame, column: str) -> pd.DataFrame:
+    """First row per value of an ID column (what a mask + iloc[0] lookup
+    picked), logging the IDs the sheet repeats instead of hiding them."""
+    duplicated = df[column].duplicated()
+    if duplicated.any():
+        logger.warning(
+            "Duplicate %s values in sheet, using the first row for: %s",
+            column, sorted(df.loc[duplicated, column].astype(str).unique())
+        )
+    return df[~duplicated]
+
+
+def _index_by(df: pd.DataFrame, column: str) -> Optional[pd.DataFrame]:
+    """`df` indexed by `column` for hash lookups with .loc, or None if the
+    column is missing. The first row per value wins, see _first_per."""
+    if column not in df.columns:
+        return None
+    return _first_per(df, column).set_index(column, drop=False)
+
+
+def _join_assignments(
+    assignments: pd.DataFrame,
+    id_col: str,
+    entities: pd.DataFrame,
+    missions_by_pid: Optional[pd.DataFrame]
+) -> Optional[pd.DataFrame]:
+    """One row per assignment (in sheet order): `id_col`, `project_id`, then
+    the mission's columns prefixed `m_` and the pilot/drone's prefixed `e_`.
+    
+    Assignments whose mission or pilot/drone can't be found are dropped, as
+    the per-row lookups this replaces skipped them. None if there is nothing
+    to join.
+    """
+    if assignments.empty or id_col not in assignments.columns or missions_by_pid is None:
+        return None
+    
+    rows = pd.DataFrame({
+        id_col: assignments[id_col].to_numpy(),
+        'project_id': assignments['current_assignment'].to_numpy()
+    })
+    rows = rows[rows[id_col].notna() & (rows['project_id'] != '-')]
+    
+    # Inner merges keep the left (assignment) order
+    rows = rows.merge(
+        missions_by_pid.reset_index(drop=True).add_prefix('m_'),
+        left_on='project_id', right_on='m_project_id', how='inner', validate='many_to_one'
+    )
+    return rows.merge(
+        _first_per(entities, id_col).add_prefix('e_'),
+        left_on=id_col, right_on=f'e_{id_col}', how='inner', validate='many_to_one'
+    )
+
+
+def _column(rows: pd.DataFrame, name: str, default='') -> pd.Series:
+    """A joined column, or `default` throughout if the sheet lacks it
+    (what Series.get gave the per-row code)."""
+    if name in rows.columns:
+        return rows[name]
+    return pd.Series(default, index=rows.index)
+
+
+def _parsed_sets(values: pd.Series, parse: Callable[[str], List[str]]) -> List[frozenset]:
+    """frozenset(parse(value)) for each value, parsing each distinct value once."""
+    parsed = {}
+    sets = []
+    for value in values:
+        value_set = parsed.get(value)
+        if value_set is None:
+            value_set = parsed[value] = frozenset(parse(value))
+        sets.append(value_set)
+    return sets
+
+
+def _lowered(values: pd.Series) -> np.ndarray:
+    """str(value).lower() for each value (missing values read 'nan', as before)."""
+    return np.char.lower(values.to_numpy(dtype=object).astype(str))
+
+
+def _records(conflict_type: str, severity: str, **columns) -> List[Dict]:
+    """Conflict dicts ('type', the given columns, then 'severity') for a set
+    of flagged rows, built in one to_dict call."""
+    columns = {
+        name: values.to_numpy() if isinstance(values, pd.Series) else values
+        for name, values in columns.items()
+    }
+    # object dtype hands values back untouched (no str inference turning None into NaN)
+    frame = pd.DataFrame({'type': conflict_type, **columns, 'severity': severity}, dtype=object)
+    return frame.to_dict('records')
+
+
+def _interleaved(first: List[Dict], first_rows: np.ndarray, second: List[Dict], second_rows: np.ndarray) -> List[Dict]:
+    """Merge two record lists by source row, `first` before `second` on the
+    same row (the order a per-row loop appending both would give)."""
+    records = first + second
+    order = np.argsort(np.concatenate([first_rows, second_rows]), kind='stable')
+    return [records[i] for i in order]
+
+
+class _Snapshot(NamedTuple):
+    """Tables read once per conflict scan and shared by the detectors."""
+    missions: pd.DataFrame
+    pilot_assignments: pd.DataFrame
+    drone_assignments: pd.DataFrame
+    # Pilot/drone assignments joined to missions, see _join_assignments
+    pilots: Optional[pd.DataFrame]
+    drones: Optional[pd.DataFrame]
+
 
 class ConflictDetector:
     """Detect conflicts in assignments and operations."""
@@ -26,342 +138,293 @@ class ConflictDetector:
         self.inventory_manager = inventory_manager
         self.assignment_tracker = assignment_tracker
     
-    def detect_double_bookings(self) -> List[Dict]:
+    def detect_double_bookings(self, snapshot: Optional[_Snapshot] = None) -> List[Dict]:
         """Detect pilots or drones assigned to overlapping projects."""
-        conflicts = []
-        
         # Get all assignments
-        missions = self.assignment_tracker.get_active_missions()
-        pilot_assignments = self.roster_manager.get_current_assignments()
-        drone_assignments = self.inventory_manager.get_deployed_drones()
+        snapshot = snapshot or self._snapshot()
+        missions = snapshot.missions
+        pilot_assignments = snapshot.pilot_assignments
+        drone_assignments = snapshot.drone_assignments
         
         # Debug: check what columns we have
-        print(f"DEBUG detect_double_bookings - pilot_assignments columns: {list(pilot_assignments.columns) if not pilot_assignments.empty else 'EMPTY'}")
-        print(f"DEBUG detect_double_bookings - drone_assignments columns: {list(drone_assignments.columns) if not drone_assignments.empty else 'EMPTY'}")
-        
-        # Check pilot double bookings
-        if not pilot_assignments.empty and 'pilot_id' in pilot_assignments.columns:
-            for pilot_id in pilot_assignments['pilot_id'].unique():
-                pilot_assigns = pilot_assignments[pilot_assignments['pilot_id'] == pilot_id]
-                
-                if len(pilot_assigns) > 1:
-                    # Multiple assignments - check for overlaps
-                    assignments_list = pilot_assigns['current_assignment'].tolist()
-                    for i, assign1 in enumerate(assignments_list):
-                        for assign2 in assignments_list[i+1:]:
-                            if 'project_id' in missions.columns:
-                                mission1 = missions[missions['project_id'] == assign1]
-                                mission2 = missions[missions['project_id'] == assign2]
-                            else:
-                                # No project_id to match, skip
-                                continue
-                            
-                            if len(mission1) > 0 and len(mission2) > 0:
-                                m1 = mission1.iloc[0]
-                                m2 = mission2.iloc[0]
-                                
-                                if dates_overlap(
-                                    m1['start_date'], m1['end_date'],
-                                    m2['start_date'], m2['end_date']
-                                ):
-                                    conflicts.append({
-                                        'type': 'double_booking',
-                                        'entity_type': 'pilot',
-                                        'entity_id': pilot_id,
-                                        'assignments': [assign1, assign2],
-                                        'severity': 'high'
-                                    })
-        
-        # Check drone double bookings
-        if not drone_assignments.empty and 'drone_id' in drone_assignments.columns:
-            for drone_id in drone_assignments['drone_id'].unique():
-                drone_assigns = drone_assignments[drone_assignments['drone_id'] == drone_id]
-                
-                if len(drone_assigns) > 1:
-                    assignments_list = drone_assigns['current_assignment'].tolist()
-                    for i, assign1 in enumerate(assignments_list):
-                        for assign2 in assignments_list[i+1:]:
-                            if 'project_id' in missions.columns:
-                                mission1 = missions[missions['project_id'] == assign1]
-                                mission2 = missions[missions['project_id'] == assign2]
-                            else:
-                                # No project_id to match, skip
-                                continue
-                            
-                            if len(mission1) > 0 and len(mission2) > 0:
-                                m1 = mission1.iloc[0]
-                                m2 = mission2.iloc[0]
-                                
-                                if dates_overlap(
-                                    m1['start_date'], m1['end_date'],
-                                    m2['start_date'], m2['end_date']
-                                ):
-                                    conflicts.append({
-                                        'type': 'double_booking',
-                                        'entity_type': 'drone',
-                                        'entity_id': drone_id,
-                                        'assignments': [assign1, assign2],
-                                        'severity': 'high'
-                                    })
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("detect_double_bookings - pilot_assignments columns: %s", list(pilot_assignments.columns) if not pilot_assignments.empty else 'EMPTY')
+            logger.debug("detect_double_bookings - drone_assignments columns: %s", list(drone_assignments.columns) if not drone_assignments.empty else 'EMPTY')
         
-        return conflicts
+        return (
+            self._overlapping_assignments(pilot_assignments, 'pilot_id', 'pilot', missions) +
+            self._overlapping_assignments(drone_assignments, 'drone_id', 'drone', missions)
+        )
     
-    def detect_skill_mismatches(self) -> List[Dict]:
-        """Detect pilots assigned to missions requiring skills/certs they lack."""
-        conflicts = []
+    @staticmethod
+    def _overlapping_assignments(
+        assignments: pd.DataFrame,
+        id_col: str,
+        entity_type: str,
+        missions: pd.DataFrame
+    ) -> List[Dict]:
+        """Double bookings for one entity type, as a vectorized interval self-join.
         
-        missions = self.assignment_tracker.get_active_missions()
-        pilot_assignments = self.roster_manager.get_current_assignments()
+        Every pair of an entity's assignments (in sheet order) whose missions'
+        date ranges overlap is reported, grouped by entity in order of first
+        appearance, like the pairwise loop this replaces.
+        """
+        if assignments.empty or id_col not in assignments.columns or 'project_id' not in missions.columns:
+            return []
         
-        if pilot_assignments.empty or 'pilot_id' not in pilot_assignments.columns:
-            return conflicts
+        # First row per project, like the old mask + iloc[0] lookup; dates
+        # that don't parse become NaT and never overlap (as in dates_overlap)
+        dates = missions.drop_duplicates('project_id')
+        dates = pd.DataFrame({
+            'project_id': dates['project_id'],
+            'start': parse_date_column(dates['start_date']),
+            'end': parse_date_column(dates['end_date'])
+        })
         
-        for _, assignment in pilot_assignments.iterrows():
-            if 'pilot_id' not in assignment or not pd.notna(assignment['pilot_id']):
-                continue
-            
-            pilot_id = assignment['pilot_id']
-            project_id = assignment.get('current_assignment', '-')
-            
-            if project_id == '-' or not 'project_id' in missions.columns:
-                continue
-            
-            mission = missions[missions['project_id'] == project_id]
-            if len(mission) == 0:
-                continue
-            
-            mission = mission.iloc[0]
-            pilot = self.roster_manager.get_pilot_by_id(pilot_id)
-            
-            if pilot is None:
-                continue
-            
-            # Check skills
-            if not skills_match(pilot.get('skills', ''), mission.get('required_skills', '')):
-                conflicts.append({
-                    'type': 'skill_mismatch',
-                    'pilot_id': pilot_id,
-                    'project_id': project_id,
-                    'required_skills': mission.get('required_skills', ''),
-                    'pilot_skills': pilot.get('skills', ''),
-                    'severity': 'high'
-                })
-            
-            # Check certifications
-            if not certifications_match(pilot.get('certifications', ''), mission.get('required_certs', '')):
-                conflicts.append({
-                    'type': 'certification_mismatch',
-                    'pilot_id': pilot_id,
-                    'project_id': project_id,
-                    'required_certs': mission.get('required_certs', ''),
-                    'pilot_certs': pilot.get('certifications', ''),
-                    'severity': 'high'
-                })
+        assigned = pd.DataFrame({
+            id_col: assignments[id_col].to_numpy(),
+            'current_assignment': assignments['current_assignment'].to_numpy()
+        }).dropna(subset=[id_col])
+        assigned['pos'] = range(len(assigned))
+        assigned['first_pos'] = assigned.groupby(id_col)['pos'].transform('min')
+        assigned = assigned.merge(
+            dates, left_on='current_assignment', right_on='project_id',
+            how='inner', validate='many_to_one'
+        )
+        # Only entities with two or more dated assignments can pair up, so
+        # keep the quadratic self-join to those rows
+        assigned = assigned.dropna(subset=['start', 'end'])
+        assigned = assigned[assigned.duplicated(id_col, keep=False)]
         
-        return conflicts
-    
-    def detect_location_mismatches(self) -> List[Dict]:
-        """Detect pilots and drones in different locations."""
-        conflicts = []
+        pairs = assigned.merge(assigned, on=id_col, suffixes=('_1', '_2'))
+        overlap = dates_overlap_mask(pairs['start_1'], pairs['end_1'], pairs['start_2'], pairs['end_2'])
+        pairs = pairs[
+            (pairs['pos_1'] < pairs['pos_2']).to_numpy() & overlap
+        ].sort_values(['first_pos_1', 'pos_1', 'pos_2'])
         
+        return _records(
+            'double_booking', 'high',
+            entity_type=entity_type,
+            entity_id=pairs[id_col],
+            assignments=list(map(list, zip(pairs['current_assignment_1'], pairs['current_assignment_2'])))
+        )
+    
+    def _snapshot(self) -> _Snapshot:
+        """Read every table the detectors need once, and join each assignment
+        with its mission and its pilot/drone row."""
         missions = self.assignment_tracker.get_active_missions()
         pilot_assignments = self.roster_manager.get_current_assignments()
         drone_assignments = self.inventory_manager.get_deployed_drones()
+        missions_by_pid = _index_by(missions, 'project_id')
         
-        if pilot_assignments.empty or 'pilot_id' not in pilot_assignments.columns:
-            return conflicts
+        return _Snapshot(
+            missions=missions,
+            pilot_assignments=pilot_assignments,
+            drone_assignments=drone_assignments,
+            pilots=_join_assignments(
+                pilot_assignments, 'pilot_id', self.roster_manager.query_pilots(), missions_by_pid
+            ),
+            drones=_join_assignments(
+                drone_assignments, 'drone_id', self.inventory_manager.query_drones(), missions_by_pid
+            )
+        )
+    
+    def detect_skill_mismatches(self, snapshot: Optional[_Snapshot] = None) -> List[Dict]:
+        """Detect pilots assigned to missions requiring skills/certs they lack."""
+        rows = (snapshot or self._snapshot()).pilots
+        if rows is None:
+            return []
         
-        for _, assignment in pilot_assignments.iterrows():
-            if 'pilot_id' not in assignment or not pd.notna(assignment['pilot_id']):
-                continue
-            
-            pilot_id = assignment['pilot_id']
-            project_id = assignment.get('current_assignment', '-')
-            
-            if project_id == '-' or not 'project_id' in missions.columns:
-                continue
-            
-            mission = missions[missions['project_id'] == project_id]
-            if len(mission) == 0:
-                continue
-            
-            mission = mission.iloc[0]
-            pilot = self.roster_manager.get_pilot_by_id(pilot_id)
-            
-            if pilot is None:
-                continue
-            
-            # Check if pilot location matches mission location
-            pilot_loc = str(pilot.get('location', '')).lower()
-            mission_loc = str(mission.get('location', '')).lower()
-            
-            if pilot_loc and mission_loc and pilot_loc != mission_loc:
-                conflicts.append({
-                    'type': 'location_mismatch',
-                    'entity_type': 'pilot',
-                    'entity_id': pilot_id,
-                    'project_id': project_id,
-                    'entity_location': pilot.get('location', 'Unknown'),
-                    'mission_location': mission.get('location', 'Unknown'),
-                    'severity': 'medium'
-                })
-            
-            # Check drone location
-            if not drone_assignments.empty and 'drone_id' in drone_assignments.columns:
-                drone_assign = drone_assignments[drone_assignments['current_assignment'] == project_id]
-                if len(drone_assign) > 0:
-                    drone = drone_assign.iloc[0]
-                    drone_loc = str(drone.get('location', '')).lower()
-                    if drone_loc and mission_loc and drone_loc != mission_loc:
-                        conflicts.append({
-                            'type': 'location_mismatch',
-                            'entity_type': 'drone',
-                            'entity_id': drone.get('drone_id', 'Unknown'),
-                            'project_id': project_id,
-                            'entity_location': drone.get('location', 'Unknown'),
-                            'mission_location': mission.get('location', 'Unknown'),
-                            'severity': 'medium'
-                        })
+        required_skills = _column(rows, 'm_required_skills')
+        pilot_skills = _column(rows, 'e_skills')
+        required_certs = _column(rows, 'm_required_certs')
+        pilot_certs = _column(rows, 'e_certifications')
         
-        return conflicts
-    
-    def detect_budget_overruns(self) -> List[Dict]:
-        """Detect missions where pilot cost exceeds budget."""
-        conflicts = []
+        # skills_match / certifications_match as set containment, parsing each
+        # distinct skills/certs string once instead of on every check
+        skills_ok = np.fromiter(map(
+            frozenset.issubset,
+            _parsed_sets(required_skills, parse_skills),
+            _parsed_sets(pilot_skills, parse_skills)
+        ), dtype=bool, count=len(rows))
+        certs_ok = np.fromiter(map(
+            frozenset.issubset,
+            _parsed_sets(required_certs, parse_certifications),
+            _parsed_sets(pilot_certs, parse_certifications)
+        ), dtype=bool, count=len(rows))
         
-        missions = self.assignment_tracker.get_active_missions()
-        pilot_assignments = self.roster_manager.get_current_assignments()
+        pilot_ids = rows['pilot_id'].to_numpy()
+        project_ids = rows['project_id'].to_numpy()
+        skill_rows = np.flatnonzero(~skills_ok)
+        cert_rows = np.flatnonzero(~certs_ok)
         
-        if pilot_assignments.empty or 'pilot_id' not in pilot_assignments.columns:
-            return conflicts
+        # A pilot's skill mismatch is listed before its certification mismatch
+        return _interleaved(
+            _records(
+                'skill_mismatch', 'high',
+                pilot_id=pilot_ids[skill_rows],
+                project_id=project_ids[skill_rows],
+                required_skills=required_skills.to_numpy()[skill_rows],
+                pilot_skills=pilot_skills.to_numpy()[skill_rows]
+            ),
+            skill_rows,
+            _records(
+                'certification_mismatch', 'high',
+                pilot_id=pilot_ids[cert_rows],
+                project_id=project_ids[cert_rows],
+                required_certs=required_certs.to_numpy()[cert_rows],
+                pilot_certs=pilot_certs.to_numpy()[cert_rows]
+            ),
+            cert_rows
+        )
+    
+    def detect_location_mismatches(self, snapshot: Optional[_Snapshot] = None) -> List[Dict]:
+        """Detect pilots and drones in different locations."""
+        snapshot = snapshot or self._snapshot()
+        rows = snapshot.pilots
+        if rows is None:
+            return []
         
-        for _, assignment in pilot_assignments.iterrows():
-            if 'pilot_id' not in assignment or not pd.notna(assignment['pilot_id']):
-                continue
-            
-            pilot_id = assignment['pilot_id']
-            project_id = assignment.get('current_assignment', '-')
-            
-            if project_id == '-' or not 'project_id' in missions.columns:
-                continue
-            
-            mission = missions[missions['project_id'] == project_id]
-            if len(mission) == 0:
-                continue
-            
-            mission = mission.iloc[0]
-            pilot = self.roster_manager.get_pilot_by_id(pilot_id)
-            
-            if pilot is None:
-                continue
-            
-            mission_budget = float(mission.get('budget', mission.get('mission_budget_inr', 0)))
-            pilot_cost = self.roster_manager.calculate_cost(
-                pilot_id,
-                mission.get('start_date', ''),
-                mission.get('end_date', '')
+        # First deployed drone per project, alongside each pilot assignment
+        drone_assignments = snapshot.drone_assignments
+        if not drone_assignments.empty and 'drone_id' in drone_assignments.columns:
+            drones = drone_assignments.drop_duplicates('current_assignment').add_prefix('d_')
+            rows = rows.merge(
+                drones, left_on='project_id', right_on='d_current_assignment',
+                how='left', validate='many_to_one', indicator=True
             )
-            
-            if mission_budget > 0 and pilot_cost > mission_budget:
-                conflicts.append({
-                    'type': 'budget_overrun',
-                    'pilot_id': pilot_id,
-                    'project_id': project_id,
-                    'mission_budget': mission_budget,
-                    'pilot_cost': pilot_cost,
-                    'overrun': pilot_cost - mission_budget,
-                    'severity': 'medium'
-                })
+            has_drone = (rows.pop('_merge') == 'both').to_numpy()
+        else:
+            has_drone = np.zeros(len(rows), dtype=bool)
         
-        return conflicts
+        pilot_location = _column(rows, 'e_location')
+        mission_location = _column(rows, 'm_location')
+        drone_location = _column(rows, 'd_location')
+        pilot_loc = _lowered(pilot_location)
+        mission_loc = _lowered(mission_location)
+        drone_loc = _lowered(drone_location)
+        
+        # Case-insensitive location compare, skipped where either side is blank
+        pilot_rows = np.flatnonzero((pilot_loc != '') & (mission_loc != '') & (pilot_loc != mission_loc))
+        drone_rows = np.flatnonzero(has_drone & (drone_loc != '') & (mission_loc != '') & (drone_loc != mission_loc))
+        
+        project_ids = rows['project_id'].to_numpy()
+        mission_location = mission_location.to_numpy()
+        
+        # A pilot's mismatch is listed before its mission's drone mismatch
+        return _interleaved(
+            _records(
+                'location_mismatch', 'medium',
+                entity_type='pilot',
+                entity_id=rows['pilot_id'].to_numpy()[pilot_rows],
+                project_id=project_ids[pilot_rows],
+                entity_location=pilot_location.to_numpy()[pilot_rows],
+                mission_location=mission_location[pilot_rows]
+            ),
+            pilot_rows,
+            _records(
+                'location_mismatch', 'medium',
+                entity_type='drone',
+                entity_id=_column(rows, 'd_drone_id').to_numpy()[drone_rows],
+                project_id=project_ids[drone_rows],
+                entity_location=drone_location.to_numpy()[drone_rows],
+                mission_location=mission_location[drone_rows]
+            ),
+            drone_rows
+        )
     
-    def detect_weather_risks(self) -> List[Dict]:
-        """Detect drones assigned to missions with incompatible weather."""
-        conflicts = []
+    def detect_budget_overruns(self, snapshot: Optional[_Snapshot] = None) -> List[Dict]:
+        """Detect missions where pilot cost exceeds budget."""
+        rows = (snapshot or self._snapshot()).pilots
+        if rows is None:
+            return []
         
-        missions = self.assignment_tracker.get_active_missions()
-        drone_assignments = self.inventory_manager.get_deployed_drones()
+        # calculate_pilot_cost for every assignment at once: daily rate times
+        # mission duration, both as columns
+        budget_column = 'm_budget' if 'm_budget' in rows.columns else 'm_mission_budget_inr'
+        mission_budget = _column(rows, budget_column, 0).astype(float)
+        pilot_cost = _column(rows, 'e_daily_rate_inr', 0).astype(float) * mission_duration_column(
+            _column(rows, 'm_start_date'), _column(rows, 'm_end_date')
+        )
+        over = ((mission_budget > 0) & (pilot_cost > mission_budget)).to_numpy()
         
-        if drone_assignments.empty or 'drone_id' not in drone_assignments.columns:
-            return conflicts
+        return _records(
+            'budget_overrun', 'medium',
+            pilot_id=rows['pilot_id'].to_numpy()[over],
+            project_id=rows['project_id'].to_numpy()[over],
+            mission_budget=mission_budget.to_numpy()[over],
+            pilot_cost=pilot_cost.to_numpy()[over],
+            overrun=(pilot_cost - mission_budget).to_numpy()[over]
+        )
+    
+    def detect_weather_risks(self, snapshot: Optional[_Snapshot] = None) -> List[Dict]:
+        """Detect drones assigned to missions with incompatible weather."""
+        rows = (snapshot or self._snapshot()).drones
+        if rows is None:
+            return []
         
-        for _, assignment in drone_assignments.iterrows():
-            if 'drone_id' not in assignment or not pd.notna(assignment['drone_id']):
-                continue
-            
-            drone_id = assignment['drone_id']
-            project_id = assignment.get('current_assignment', '-')
-            
-            if project_id == '-' or not 'project_id' in missions.columns:
-                continue
-            
-            mission = missions[missions['project_id'] == project_id]
-            if len(mission) == 0:
-                continue
-            
-            mission = mission.iloc[0]
-            drone = self.inventory_manager.get_drone_by_id(drone_id)
-            
-            if drone is None:
-                continue
-            
-            if not is_weather_compatible(
-                drone.get('weather_resistance', ''), 
-                mission.get('weather_forecast', '')
-            ):
-                conflicts.append({
-                    'type': 'weather_risk',
-                    'drone_id': drone_id,
-                    'project_id': project_id,
-                    'drone_weather_resistance': drone.get('weather_resistance', ''),
-                    'mission_weather': mission.get('weather_forecast', ''),
-                    'severity': 'high'
-                })
+        # is_weather_compatible for every assignment at once
+        weather_resistance = _column(rows, 'e_weather_resistance')
+        weather_forecast = _column(rows, 'm_weather_forecast')
+        risky = ~weather_compatible_mask(weather_resistance, weather_forecast).to_numpy()
         
-        return conflicts
+        return _records(
+            'weather_risk', 'high',
+            drone_id=rows['drone_id'].to_numpy()[risky],
+            project_id=rows['project_id'].to_numpy()[risky],
+            drone_weather_resistance=weather_resistance.to_numpy()[risky],
+            mission_weather=weather_forecast.to_numpy()[risky]
+        )
     
-    def detect_maintenance_issues(self) -> List[Dict]:
+    def detect_maintenance_issues(self, snapshot: Optional[_Snapshot] = None) -> List[Dict]:
         """Detect drones assigned but due for maintenance."""
         conflicts = []
         
         try:
             maintenance_due = self.inventory_manager.get_maintenance_due_drones()
-            drone_assignments = self.inventory_manager.get_deployed_drones()
+            drone_assignments = (snapshot or self._snapshot()).drone_assignments
             
             if maintenance_due.empty or 'drone_id' not in maintenance_due.columns:
                 return conflicts
+            if drone_assignments.empty or 'drone_id' not in drone_assignments.columns:
+                return conflicts
             
-            for _, drone in maintenance_due.iterrows():
-                if 'drone_id' not in drone or not pd.notna(drone['drone_id']):
-                    continue
-                
-                drone_id = drone['drone_id']
-                if not drone_assignments.empty and 'drone_id' in drone_assignments.columns:
-                    assigned = drone_assignments[drone_assignments['drone_id'] == drone_id]
-                    
-                    if len(assigned) > 0:
-                        conflicts.append({
-                            'type': 'maintenance_due',
-                            'drone_id': drone_id,
-                            'maintenance_due_date': drone.get('maintenance_due', 'Unknown'),
-                            'current_assignment': assigned.iloc[0].get('current_assignment', '-'),
-                            'severity': 'high'
-                        })
+            # Semi-join of due drones with each drone's first current assignment
+            due = pd.DataFrame({
+                'drone_id': maintenance_due['drone_id'].to_numpy(),
+                'maintenance_due_date': _column(maintenance_due, 'maintenance_due', 'Unknown').to_numpy()
+            }).dropna(subset=['drone_id'])
+            assigned = pd.DataFrame({
+                'drone_id': drone_assignments['drone_id'].to_numpy(),
+                'current_assignment': _column(drone_assignments, 'current_assignment', '-').to_numpy()
+            }).drop_duplicates('drone_id')
+            due = due.merge(assigned, on='drone_id', how='inner', validate='many_to_one')
+            
+            conflicts = _records(
+                'maintenance_due', 'high',
+                drone_id=due['drone_id'],
+                maintenance_due_date=due['maintenance_due_date'],
+                current_assignment=due['current_assignment']
+            )
         except Exception as e:
-            print(f"DEBUG: Error in detect_maintenance_issues: {e}")
+            logger.warning("Error in detect_maintenance_issues: %s", e)
         
         return conflicts
     
     def detect_all_conflicts(self) -> Dict[str, List[Dict]]:
         """Detect all types of conflicts."""
-        return {
-            'double_bookings': self.detect_double_bookings(),
-            'skill_mismatches': self.detect_skill_mismatches(),
-            'location_mismatches': self.detect_location_mismatches(),
-            'budget_overruns': self.detect_budget_overruns(),
-            'weather_risks': self.detect_weather_risks(),
-            'maintenance_issues': self.detect_maintenance_issues()
-        }
+        # One batch for the whole scan, and one snapshot (tables read and
+        # assignments joined to their missions once) shared by every detector
+        with self.sheets_sync.batch():
+            snapshot = self._snapshot()
+            return {
+                'double_bookings': self.detect_double_bookings(snapshot),
+                'skill_mismatches': self.detect_skill_mismatches(snapshot),
+                'location_mismatches': self.detect_location_mismatches(snapshot),
+                'budget_overruns': self.detect_budget_overruns(snapshot),
+                'weather_risks': self.detect_weather_risks(snapshot),
+                'maintenance_issues': self.detect_maintenance_issues(snapshot)
+            }
     
     def get_conflict_summary(self) -> str:
         """Get a human-readable summary of all conflicts."""
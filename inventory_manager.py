@@ -1,57 +1,141 @@
 """Drone inventory management logic."""
+import time
+import logging
+from datetime import datetime
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Optional
-from utils import is_maintenance_due, is_weather_compatible
+from typing import List, Dict, Optional, NamedTuple
+from utils import (
+    parse_date_column, contains_any, contains_text, lowered_text,
+    weather_compatible_mask, all_weather_mask
+)
 from sheets_sync import GoogleSheetsSync
 
+logger = logging.getLogger(__name__)
+
+# Fleet data younger than this is reused instead of re-read from Sheets
+_REFRESH_TTL = 2.0  # seconds
+
+
+class _FleetState(NamedTuple):
+    """One refresh of the fleet and everything derived from it.
+    
+    Published with a single assignment, so a reader that takes one reference
+    never pairs a new fleet with another refresh's derived columns.
+    """
+    fleet: pd.DataFrame
+    # project_id -> assigned drone IDs (sheet order)
+    by_assignment: Dict[str, List[str]]
+    # Rows with a current assignment
+    assigned_mask: np.ndarray
+    # drone_id -> row position (first occurrence)
+    row_by_id: Dict[str, int]
+    # Drones rated for any weather, per fleet row
+    all_weather: pd.Series
+    # Parsed maintenance_due dates (NaT if unparseable), per fleet row
+    maintenance_dates: pd.Series
+    # Lowercased location/status text per fleet row, for contains_text
+    lowered: Dict[str, pd.Series]
+
 
 class InventoryManager:
     """Manage drone inventory operations."""
     
     def __init__(self, sheets_sync: GoogleSheetsSync):
         self.sheets_sync = sheets_sync
-        self._fleet = None
+        # The latest refresh, see _FleetState
+        self._state: Optional[_FleetState] = None
+        self._last_refresh = 0.0
         self._refresh_fleet()
     
     def _refresh_fleet(self):
-        """Refresh fleet data from Google Sheets."""
-        self._fleet = self.sheets_sync.get_drone_fleet()
+        """Refresh fleet data from Google Sheets (at most once per _REFRESH_TTL)."""
+        if time.monotonic() - self._last_refresh < _REFRESH_TTL:
+            return
         
-        # Debug: print available columns
-        if self._fleet is not None and not self._fleet.empty:
-            print(f"DEBUG: Fleet columns available: {list(self._fleet.columns)}")
+        # Normalize a local frame and publish it with everything derived from
+        # it in one assignment, so concurrent readers never see a mix
+        fleet = self.sheets_sync.get_drone_fleet()
+        
+        # Debug: log available columns
+        if fleet is not None and not fleet.empty and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Fleet columns available: %s", list(fleet.columns))
         
         # Handle empty dataframe
-        if self._fleet is None or self._fleet.empty:
-            print("WARNING: Fleet data is empty")
-            self._fleet = pd.DataFrame(columns=[
+        if fleet is None or fleet.empty:
+            logger.warning("Fleet data is empty")
+            fleet = pd.DataFrame(columns=[
                 'drone_id', 'model', 'capabilities', 'status', 
                 'location', 'current_assignment', 'weather_resistance', 'maintenance_due'
             ])
         
         # Ensure drone_id column exists
-        if 'drone_id' not in self._fleet.columns:
+        if 'drone_id' not in fleet.columns:
             # Try to find alternate ID column names
-            id_candidates = [col for col in self._fleet.columns if 'id' in col.lower() or 'drone' in col.lower()]
+            id_candidates = [col for col in fleet.columns if 'id' in col.lower() or 'drone' in col.lower()]
             if id_candidates:
                 alt_id = id_candidates[0]
-                self._fleet['drone_id'] = self._fleet[alt_id]
+                fleet['drone_id'] = fleet[alt_id]
             else:
                 # Create drone_id from index
-                if len(self._fleet) > 0:
-                    self._fleet['drone_id'] = [f"D{i:03d}" for i in range(len(self._fleet))]
+                if len(fleet) > 0:
+                    fleet['drone_id'] = [f"D{i:03d}" for i in range(len(fleet))]
                 else:
-                    self._fleet['drone_id'] = []
+                    fleet['drone_id'] = []
         
         # Ensure required columns exist
-        if 'current_assignment' not in self._fleet.columns:
-            self._fleet['current_assignment'] = '-'
-        if 'status' not in self._fleet.columns:
-            self._fleet['status'] = 'Available'
-        if 'weather_resistance' not in self._fleet.columns:
-            self._fleet['weather_resistance'] = ''
-        if 'maintenance_due' not in self._fleet.columns:
-            self._fleet['maintenance_due'] = 'No'
+        if 'current_assignment' not in fleet.columns:
+            fleet['current_assignment'] = '-'
+        if 'status' not in fleet.columns:
+            fleet['status'] = 'Available'
+        if 'weather_resistance' not in fleet.columns:
+            fleet['weather_resistance'] = ''
+        if 'maintenance_due' not in fleet.columns:
+            fleet['maintenance_due'] = 'No'
+        
+        # Rows with a current assignment, kept for get_deployed_drones
+        assigned_mask = (
+            (fleet['current_assignment'].notna()) & 
+            (fleet['current_assignment'] != '-')
+        ).to_numpy()
+        
+        # project_id -> assigned drone IDs (sheet order), for O(1) lookups
+        assigned = fleet[assigned_mask]
+        by_assignment = (
+            assigned.groupby('current_assignment', sort=False)['drone_id'].apply(list).to_dict()
+        )
+        
+        # drone_id -> row position, first occurrence wins like the old mask lookup
+        row_by_id = {}
+        for i, drone_id in enumerate(fleet['drone_id'].to_numpy()):
+            row_by_id.setdefault(drone_id, i)
+        
+        # Weather ratings are free text; classify them once per refresh
+        all_weather = all_weather_mask(fleet['weather_resistance'])
+        
+        # Parse maintenance dates once; the due check compares them to now
+        maintenance_dates = parse_date_column(fleet['maintenance_due'])
+        
+        # Case-fold the text columns queries search, once per refresh
+        lowered = {
+            column: lowered_text(fleet[column])
+            for column in ('location', 'status') if column in fleet.columns
+        }
+        
+        self._state = _FleetState(
+            fleet=fleet,
+            by_assignment=by_assignment,
+            assigned_mask=assigned_mask,
+            row_by_id=row_by_id,
+            all_weather=all_weather,
+            maintenance_dates=maintenance_dates,
+            lowered=lowered
+        )
+        self._last_refresh = time.monotonic()
+    
+    def invalidate(self):
+        """Drop the cached fleet so the next access re-reads Google Sheets."""
+        self._last_refresh = 0.0
     
     def query_drones(
         self,
@@ -62,26 +146,22 @@ class InventoryManager:
     ) -> pd.DataFrame:
         """Query drones by various criteria."""
         self._refresh_fleet()
-        df = self._fleet.copy()
+        state = self._state
+        all_weather, lowered = state.all_weather, state.lowered
+        df = state.fleet.copy()
         
         if capabilities:
-            df = df[df['capabilities'].apply(
-                lambda x: any(cap in str(x) for cap in capabilities)
-            )]
+            df = df[contains_any(df['capabilities'], capabilities)]
         
         if status:
-            df = df[df['status'].str.contains(status, case=False, na=False)]
+            df = df[contains_text(df['status'], status, lowered.get('status'))]
         
         if location:
-            df = df[df['location'].str.contains(location, case=False, na=False)]
+            df = df[contains_text(df['location'], location, lowered.get('location'))]
         
         if weather_forecast:
-            df = df[df.apply(
-                lambda row: is_weather_compatible(
-                    row['weather_resistance'], 
-                    weather_forecast
-                ),
-                axis=1
+            df = df[weather_compatible_mask(
+                df['weather_resistance'], weather_forecast, all_weather=all_weather.loc[df.index]
             )]
         
         return df
@@ -93,8 +173,9 @@ class InventoryManager:
     def get_drone_by_id(self, drone_id: str) -> Optional[pd.Series]:
         """Get drone by ID."""
         self._refresh_fleet()
-        matches = self._fleet[self._fleet['drone_id'] == drone_id]
-        return matches.iloc[0] if len(matches) > 0 else None
+        state = self._state
+        idx = state.row_by_id.get(drone_id)
+        return None if idx is None else state.fleet.iloc[idx]
     
     def get_drones_by_weather(self, weather_forecast: str) -> pd.DataFrame:
         """Get drones compatible with weather forecast."""
@@ -103,17 +184,21 @@ class InventoryManager:
     def get_maintenance_due_drones(self) -> pd.DataFrame:
         """Get drones with maintenance due."""
         self._refresh_fleet()
-        return self._fleet[
-            self._fleet['maintenance_due'].apply(is_maintenance_due)
-        ]
+        state = self._state
+        fleet, maintenance_dates = state.fleet, state.maintenance_dates
+        # NaT (blank or unparseable dates) compares False, as in is_maintenance_due
+        return fleet[(maintenance_dates <= datetime.now()).to_numpy()]
     
     def get_deployed_drones(self) -> pd.DataFrame:
         """Get all deployed drones."""
         self._refresh_fleet()
-        return self._fleet[
-            (self._fleet['current_assignment'].notna()) & 
-            (self._fleet['current_assignment'] != '-')
-        ]
+        state = self._state
+        return state.fleet[state.assigned_mask]
+    
+    def get_drones_for_assignment(self, project_id: str) -> List[str]:
+        """Get IDs of drones currently assigned to a project."""
+        self._refresh_fleet()
+        return self._state.by_assignment.get(project_id, [])
     
     def update_drone_status(
         self,
@@ -128,7 +213,7 @@ class InventoryManager:
             return False
         
         self.sheets_sync.update_drone_status(drone_id, status, assignment)
-        self._refresh_fleet()
+        self.invalidate()
         return True
     
     def is_drone_available(self, drone_id: str) -> bool:
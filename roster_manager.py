@@ -1,56 +1,158 @@
 """Pilot roster management logic."""
+import time
+import logging
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, NamedTuple
 from utils import (
-    parse_skills, parse_certifications, skills_match, 
-    certifications_match, calculate_pilot_cost, dates_overlap
+    parse_skills, parse_certifications, 
+    calculate_pilot_cost, calculate_mission_duration, dates_overlap,
+    lowered_text, contains_text
 )
 from sheets_sync import GoogleSheetsSync
 
+logger = logging.getLogger(__name__)
+
+# Roster data younger than this is reused instead of re-read from Sheets
+_REFRESH_TTL = 2.0  # seconds
+
+
+def _parsed_column(roster: pd.DataFrame, column: str, parse) -> pd.Series:
+    """frozenset(parse(value)) per row of a comma-separated column (empty
+    sets if the sheet lacks it), parsing each distinct value once."""
+    if column not in roster.columns:
+        return pd.Series([frozenset()] * len(roster), index=roster.index, dtype=object)
+    values = roster[column]
+    parsed = {value: frozenset(parse(value)) for value in values.drop_duplicates()}
+    return values.map(parsed).astype(object)
+
+
+class _RosterState(NamedTuple):
+    """One refresh of the roster and everything derived from it.
+    
+    Published with a single assignment, so a reader that takes one reference
+    never pairs a new roster with another refresh's derived columns.
+    """
+    roster: pd.DataFrame
+    # project_id -> assigned pilot IDs (sheet order)
+    by_assignment: Dict[str, List[str]]
+    # Rows with a current assignment
+    assigned_mask: np.ndarray
+    # IDs of pilots holding any assignment
+    assigned_ids: frozenset
+    # pilot_id -> row position (first occurrence)
+    row_by_id: Dict[str, int]
+    # Parsed skills/certifications per roster row
+    skill_sets: pd.Series
+    cert_sets: pd.Series
+    # daily_rate_inr as floats per roster row (NaN if missing or unreadable)
+    daily_rates: pd.Series
+    # Lowercased location/status text per roster row, for contains_text
+    lowered: Dict[str, pd.Series]
+
 
 class RosterManager:
     """Manage pilot roster operations."""
     
     def __init__(self, sheets_sync: GoogleSheetsSync):
         self.sheets_sync = sheets_sync
-        self._roster = None
+        # The latest refresh, see _RosterState
+        self._state: Optional[_RosterState] = None
+        self._last_refresh = 0.0
         self._refresh_roster()
     
     def _refresh_roster(self):
-        """Refresh roster data from Google Sheets."""
-        self._roster = self.sheets_sync.get_pilot_roster()
+        """Refresh roster data from Google Sheets (at most once per _REFRESH_TTL)."""
+        if time.monotonic() - self._last_refresh < _REFRESH_TTL:
+            return
+        
+        # Normalize a local frame and publish it with everything derived from
+        # it in one assignment, so concurrent readers never see a mix
+        roster = self.sheets_sync.get_pilot_roster()
         
-        # Debug: print available columns
-        if self._roster is not None and not self._roster.empty:
-            print(f"DEBUG: Roster columns available: {list(self._roster.columns)}")
+        # Debug: log available columns
+        if roster is not None and not roster.empty and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Roster columns available: %s", list(roster.columns))
         
         # Handle empty dataframe
-        if self._roster is None or self._roster.empty:
-            print("WARNING: Roster data is empty")
-            self._roster = pd.DataFrame(columns=[
+        if roster is None or roster.empty:
+            logger.warning("Roster data is empty")
+            roster = pd.DataFrame(columns=[
                 'pilot_id', 'name', 'skills', 'certifications', 
                 'hourly_rate', 'location', 'status', 'current_assignment'
             ])
         
         # Ensure pilot_id column exists
-        if 'pilot_id' not in self._roster.columns:
+        if 'pilot_id' not in roster.columns:
             # Try to find alternate ID column names
-            id_candidates = [col for col in self._roster.columns if 'id' in col.lower()]
+            id_candidates = [col for col in roster.columns if 'id' in col.lower()]
             if id_candidates:
                 alt_id = id_candidates[0]
-                self._roster['pilot_id'] = self._roster[alt_id]
+                roster['pilot_id'] = roster[alt_id]
             else:
                 # Create pilot_id from index or first column
-                if len(self._roster) > 0:
-                    self._roster['pilot_id'] = [f"P{i:03d}" for i in range(len(self._roster))]
+                if len(roster) > 0:
+                    roster['pilot_id'] = [f"P{i:03d}" for i in range(len(roster))]
                 else:
-                    self._roster['pilot_id'] = []
+                    roster['pilot_id'] = []
         
         # Ensure required columns exist
-        if 'current_assignment' not in self._roster.columns:
-            self._roster['current_assignment'] = '-'
-        if 'status' not in self._roster.columns:
-            self._roster['status'] = 'Available'
+        if 'current_assignment' not in roster.columns:
+            roster['current_assignment'] = '-'
+        if 'status' not in roster.columns:
+            roster['status'] = 'Available'
+        
+        # Rows with a current assignment, kept for get_current_assignments
+        assigned_mask = (
+            (roster['current_assignment'].notna()) & 
+            (roster['current_assignment'] != '-')
+        ).to_numpy()
+        
+        # project_id -> assigned pilot IDs (sheet order), for O(1) lookups
+        assigned = roster[assigned_mask]
+        by_assignment = (
+            assigned.groupby('current_assignment', sort=False)['pilot_id'].apply(list).to_dict()
+        )
+        # IDs of pilots holding any assignment, for is_pilot_available
+        assigned_ids = frozenset(assigned['pilot_id'].tolist())
+        
+        # pilot_id -> row position, first occurrence wins like the old mask lookup
+        row_by_id = {}
+        for i, pilot_id in enumerate(roster['pilot_id'].to_numpy()):
+            row_by_id.setdefault(pilot_id, i)
+        
+        # Skills/certifications parsed once per refresh instead of on every query
+        skill_sets = _parsed_column(roster, 'skills', parse_skills)
+        cert_sets = _parsed_column(roster, 'certifications', parse_certifications)
+        
+        # Rates come in as text; convert them once (NaN if missing or unreadable)
+        if 'daily_rate_inr' in roster.columns:
+            daily_rates = pd.to_numeric(roster['daily_rate_inr'], errors='coerce').astype(float)
+        else:
+            daily_rates = pd.Series(float('nan'), index=roster.index)
+        
+        # Case-fold the text columns queries search, once per refresh
+        lowered = {
+            column: lowered_text(roster[column])
+            for column in ('location', 'status') if column in roster.columns
+        }
+        
+        self._state = _RosterState(
+            roster=roster,
+            by_assignment=by_assignment,
+            assigned_mask=assigned_mask,
+            assigned_ids=assigned_ids,
+            row_by_id=row_by_id,
+            skill_sets=skill_sets,
+            cert_sets=cert_sets,
+            daily_rates=daily_rates,
+            lowered=lowered
+        )
+        self._last_refresh = time.monotonic()
+    
+    def invalidate(self):
+        """Drop the cached roster so the next access re-reads Google Sheets."""
+        self._last_refresh = 0.0
     
     def query_pilots(
         self, 
@@ -61,23 +163,24 @@ class RosterManager:
     ) -> pd.DataFrame:
         """Query pilots by various criteria."""
         self._refresh_roster()
-        df = self._roster.copy()
+        state = self._state
+        roster, skill_sets, cert_sets = state.roster, state.skill_sets, state.cert_sets
+        lowered = state.lowered
         
+        mask = pd.Series(True, index=roster.index)
         if skills:
-            df = df[df['skills'].apply(
-                lambda x: any(skill in parse_skills(x) for skill in skills)
-            )]
+            mask &= ~skill_sets.map(frozenset(skills).isdisjoint).astype(bool)
         
         if certifications:
-            df = df[df['certifications'].apply(
-                lambda x: any(cert in parse_certifications(x) for cert in certifications)
-            )]
+            mask &= ~cert_sets.map(frozenset(certifications).isdisjoint).astype(bool)
+        
+        df = roster[mask]
         
         if location:
-            df = df[df['location'].str.contains(location, case=False, na=False)]
+            df = df[contains_text(df['location'], location, lowered.get('location'))]
         
         if status:
-            df = df[df['status'].str.contains(status, case=False, na=False)]
+            df = df[contains_text(df['status'], status, lowered.get('status'))]
         
         return df
     
@@ -88,8 +191,9 @@ class RosterManager:
     def get_pilot_by_id(self, pilot_id: str) -> Optional[pd.Series]:
         """Get pilot by ID."""
         self._refresh_roster()
-        matches = self._roster[self._roster['pilot_id'] == pilot_id]
-        return matches.iloc[0] if len(matches) > 0 else None
+        state = self._state
+        idx = state.row_by_id.get(pilot_id)
+        return None if idx is None else state.roster.iloc[idx]
     
     def calculate_cost(self, pilot_id: str, start_date: str, end_date: str) -> float:
         """Calculate total cost for a pilot for a mission."""
@@ -103,10 +207,13 @@ class RosterManager:
     def get_current_assignments(self) -> pd.DataFrame:
         """Get all pilots with current assignments."""
         self._refresh_roster()
-        return self._roster[
-            (self._roster['current_assignment'].notna()) & 
-            (self._roster['current_assignment'] != '-')
-        ]
+        state = self._state
+        return state.roster[state.assigned_mask]
+    
+    def get_pilots_for_assignment(self, project_id: str) -> List[str]:
+        """Get IDs of pilots currently assigned to a project."""
+        self._refresh_roster()
+        return self._state.by_assignment.get(project_id, [])
     
     def update_pilot_status(
         self, 
@@ -121,7 +228,7 @@ class RosterManager:
             return False
         
         self.sheets_sync.update_pilot_status(pilot_id, status, assignment)
-        self._refresh_roster()
+        self.invalidate()
         return True
     
     def is_pilot_available(
@@ -139,13 +246,9 @@ class RosterManager:
         if pilot['status'] not in ['Available']:
             return False
         
-        # Check if pilot has overlapping assignments
-        assignments = self.get_current_assignments()
-        pilot_assignments = assignments[assignments['pilot_id'] == pilot_id]
-        
         # For now, if pilot has any assignment, they're not available
         # In a full implementation, we'd check date overlaps
-        if len(pilot_assignments) > 0:
+        if pilot_id in self._state.assigned_ids:
             return False
         
         return True
@@ -161,38 +264,24 @@ class RosterManager:
     ) -> pd.DataFrame:
         """Find pilots matching mission requirements."""
         self._refresh_roster()
+        state = self._state
+        roster, skill_sets, cert_sets = state.roster, state.skill_sets, state.cert_sets
+        daily_rates, lowered = state.daily_rates, state.lowered
         
-        # Filter by skills
-        df = self._roster[
-            self._roster['skills'].apply(
-                lambda x: skills_match(x, required_skills)
-            )
-        ]
-        
-        # Filter by certifications
-        df = df[
-            df['certifications'].apply(
-                lambda x: certifications_match(x, required_certs)
-            )
-        ]
+        # Filter by skills and certifications (pilot must have all of each)
+        has_skills = skill_sets.map(frozenset(parse_skills(required_skills)).issubset)
+        has_certs = cert_sets.map(frozenset(parse_certifications(required_certs)).issubset)
+        df = roster[(has_skills & has_certs).astype(bool)]
         
         # Filter by location
-        df = df[df['location'].str.contains(location, case=False, na=False)]
+        df = df[contains_text(df['location'], location, lowered.get('location'))]
         
         # Filter by availability
         df = df[df['status'] == 'Available']
         
         # Filter by budget if specified
         if max_budget:
-            df = df[
-                df.apply(
-                    lambda row: calculate_pilot_cost(
-                        float(row['daily_rate_inr']), 
-                        start_date, 
-                        end_date
-                    ) <= max_budget,
-                    axis=1
-                )
-            ]
+            duration = calculate_mission_duration(start_date, end_date)
+            df = df[daily_rates.loc[df.index] * duration <= max_budget]
         
         return df
@@ -1,9 +1,20 @@
 """Google Sheets integration for 2-way sync using Service Account."""
 import os
+import time
+import hashlib
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+import httplib2
 import pandas as pd
 from google.oauth2.service_account import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest, build_http
 from typing import Optional, List, Dict
 
 # Try to import streamlit for secrets access
@@ -15,6 +26,116 @@ except ImportError:
 
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
 
+# Sheet reads younger than this are reused; writes through this instance
+# drop the written sheet's entries right away
+_READ_TTL = 2.0  # seconds
+
+# Rate limiting and transient server errors are retried with backoff
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_MAX_TRIES = 6
+_MAX_BACKOFF = 60.0  # seconds
+# Reads that can fall back to a snapshot give up after this, which leaves
+# room for one retry: an outage should cost a chat turn seconds, not minutes
+_FALLBACK_RETRY_BUDGET = 3.0  # seconds
+# Once a read has fallen back, reads of that range use the snapshot for this
+# long instead of waiting on Google again
+_OUTAGE_TTL = 30.0  # seconds
+
+# Last good copy of each sheet, served to readers when Google is unreachable.
+# Pickled rather than parquet: pyarrow isn't a dependency, and pickle keeps
+# the object columns exactly as read. Copies are only a fallback, never
+# served in place of a live read, so a fresh one can't hide a recent write.
+_SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'sheets')
+# Copies not confirmed by a live read for this long are not served
+_SNAPSHOT_MAX_AGE = 24 * 60 * 60  # seconds
+# Live reads refresh a range's copy at most this often
+_SNAPSHOT_INTERVAL = 60.0  # seconds
+
+# Secrets naming the spreadsheets the app reads, see prefetch_all
+_SHEET_ID_SECRETS = ('PILOT_ROSTER_SHEET_ID', 'DRONE_FLEET_SHEET_ID', 'MISSIONS_SHEET_ID')
+
+logger = logging.getLogger(__name__)
+
+# Snapshot upkeep (compare, pickle) runs here, off the request path; one
+# worker, so saves of the same range never race
+_snapshot_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sheet-snapshot')
+
+class _SheetUnavailable(RuntimeError):
+    """A sheet read failed for a transient reason (retryable status, network)."""
+
+def _is_transient(error: Exception) -> bool:
+    """Whether a failed call may succeed later (rate limit, 5xx, network)."""
+    if isinstance(error, HttpError):
+        return getattr(error.resp, 'status', None) in _RETRY_STATUSES
+    return isinstance(error, (OSError, httplib2.HttpLib2Error))
+
+def _execute(request, deadline: Optional[float] = None):
+    """request.execute(), retrying 429/5xx responses with exponential backoff
+    and jitter (or the server's Retry-After, when it sends one).
+    
+    With a `deadline` (a time.monotonic() value), a retry that couldn't start
+    before it isn't made; the error is raised instead.
+    """
+    for attempt in range(_MAX_TRIES):
+        try:
+            return request.execute()
+        except HttpError as error:
+            status = getattr(error.resp, 'status', None)
+            if status not in _RETRY_STATUSES or attempt == _MAX_TRIES - 1:
+                raise
+            delay = 2 ** attempt + random.random()
+            try:
+                delay = float(error.resp.get('retry-after', delay))
+            except (AttributeError, TypeError, ValueError):
+                pass
+            delay = min(delay, _MAX_BACKOFF)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise
+            logger.warning("Sheets API returned %s, retrying in %.1fs", status, delay)
+            time.sleep(delay)
+
+def _snapshot_path(sheet_id: str, range_name: Optional[str]) -> str:
+    """Where the last good read of a sheet range is kept on disk."""
+    key = hashlib.sha1(f"{sheet_id}|{range_name or ''}".encode()).hexdigest()
+    return os.path.join(_SNAPSHOT_DIR, f"{key}.pkl")
+
+def _save_snapshot(sheet_id: str, range_name: Optional[str], df: pd.DataFrame) -> bool:
+    """Keep a successful read on disk (best effort; written atomically)."""
+    path = _snapshot_path(sheet_id, range_name)
+    try:
+        os.makedirs(_SNAPSHOT_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        logger.debug("Could not save snapshot of sheet %s: %s", sheet_id, e)
+        return False
+
+def _touch_snapshot(sheet_id: str, range_name: Optional[str]):
+    """Mark a saved copy as confirmed by a live read just now."""
+    try:
+        os.utime(_snapshot_path(sheet_id, range_name))
+    except OSError:
+        pass
+
+def _load_snapshot(sheet_id: str, range_name: Optional[str], error: Exception) -> Optional[pd.DataFrame]:
+    """The last good read of a sheet range, if one was saved within
+    _SNAPSHOT_MAX_AGE, for when the API is unavailable (after retries)."""
+    path = _snapshot_path(sheet_id, range_name)
+    try:
+        saved = os.path.getmtime(path)
+        if time.time() - saved > _SNAPSHOT_MAX_AGE:
+            return None
+        df = pd.read_pickle(path)
+    except Exception:
+        return None
+    saved_at = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(saved))
+    logger.warning(
+        "Reading sheet %s failed (%s); using the copy saved at %s", sheet_id, error, saved_at
+    )
+    return df
+
 def get_secret(key: str, default=None):
     """Get secret from Streamlit secrets or environment variables."""
     if HAS_STREAMLIT:
@@ -24,6 +145,16 @@ def get_secret(key: str, default=None):
             pass
     return os.getenv(key, default)
 
+@lru_cache(maxsize=None)
+def col_idx_to_letter(idx: int) -> str:
+    """Convert a 0-based column index to its A1 letters (0=A, 25=Z, 26=AA)."""
+    letters = ''
+    while idx >= 0:
+        idx, remainder = divmod(idx, 26)
+        letters = chr(ord('A') + remainder) + letters
+        idx -= 1
+    return letters
+
 def get_google_credentials_dict():
     """Get Google credentials dict from Streamlit secrets."""
     if HAS_STREAMLIT:
@@ -44,6 +175,18 @@ class GoogleSheetsSync:
     def __init__(self):
         self.creds = None
         self.service = None
+        # Per-thread batch state, see batch()
+        self._local = threading.local()
+        # sheet_id -> first sheet title, looked up once per spreadsheet
+        self._sheet_names: Dict[str, str] = {}
+        # (sheet_id, range_name) -> (read time, DataFrame), see _cached_read
+        self._read_cache: Dict[tuple, tuple] = {}
+        # (sheet_id, range_name) -> (fallback time, snapshot), see read_sheet
+        self._fallbacks: Dict[tuple, tuple] = {}
+        # (sheet_id, range_name) -> frame last saved to disk, see _update_snapshot
+        self._snapshots: Dict[tuple, pd.DataFrame] = {}
+        # (sheet_id, range_name) -> when its copy was last refreshed, see _keep_snapshot
+        self._snapshot_checked: Dict[tuple, float] = {}
         self._authenticate()
     
     def _authenticate(self):
@@ -62,7 +205,14 @@ class GoogleSheetsSync:
                 scopes=SCOPES
             )
             
-            self.service = build('sheets', 'v4', credentials=self.creds)
+            # static_discovery: use the discovery document bundled with the
+            # client library instead of fetching it on every start
+            self.service = build(
+                'sheets', 'v4',
+                credentials=self.creds,
+                requestBuilder=self._build_request,
+                static_discovery=True
+            )
             print("✓ Google Sheets API initialized successfully")
             
         except Exception as e:
@@ -70,72 +220,327 @@ class GoogleSheetsSync:
             self.creds = None
             self.service = None
     
-    def _get_first_sheet_name(self, sheet_id: str) -> str:
-        """Get the name of the first sheet in a spreadsheet."""
+    def _build_request(self, http, *args, **kwargs) -> HttpRequest:
+        """Build API requests on this thread's own authorized connection.
+        
+        httplib2 connections are not thread-safe, and the agent runs Sheets
+        calls on worker threads; a per-thread AuthorizedHttp keeps its
+        keep-alive connection (and token) across calls instead. build_http()
+        gives it the client library's socket timeout and redirect handling.
+        """
+        thread_http = getattr(self._local, 'http', None)
+        if thread_http is None:
+            thread_http = self._local.http = AuthorizedHttp(self.creds, http=build_http())
+        return HttpRequest(thread_http, *args, **kwargs)
+    
+    @contextmanager
+    def batch(self):
+        """Group the Sheets calls made inside the block into fewer requests.
+        
+        Within a batch, repeated reads of the same sheet are served from
+        memory, and cell writes are queued (the last write to a range wins)
+        and sent as one values().batchUpdate per spreadsheet. Reading a sheet
+        with queued writes flushes them first, so reads always see them; the
+        row lookups of status updates don't (see _rows_for_write), so
+        several updates to one sheet go out together. Pending writes are
+        flushed when the outermost block exits. Batches nest and are
+        per-thread.
+        """
+        state = self._local
+        if getattr(state, 'depth', 0) == 0:
+            state.reads = {}
+            state.writes = {}
+            state.rows = {}
+            state.depth = 0
+        
+        state.depth += 1
+        try:
+            yield self
+        finally:
+            state.depth -= 1
+            if state.depth == 0:
+                try:
+                    self._flush_writes()
+                finally:
+                    state.reads = state.writes = state.rows = None
+    
+    def _in_batch(self) -> bool:
+        """Whether the current thread is inside a batch() block."""
+        return getattr(self._local, 'depth', 0) > 0
+    
+    def _flush_writes(self, sheet_id: Optional[str] = None):
+        """Send queued batch writes (for one spreadsheet, or all of them)."""
+        writes = self._local.writes
+        sheet_ids = [sheet_id] if sheet_id is not None else list(writes)
+        
+        for sid in sheet_ids:
+            # One request per valueInputOption used (almost always just RAW)
+            for value_input, pending in writes.pop(sid, {}).items():
+                if pending:
+                    data = [{'range': range_name, 'values': values} for range_name, values in pending.items()]
+                    self._send_batch_update(sid, data, value_input)
+    
+    def _send_batch_update(self, sheet_id: str, data: List[Dict], value_input: str = 'RAW'):
+        """Write several ranges of one spreadsheet in a single request."""
+        self._forget_reads(sheet_id)
         try:
-            spreadsheet = self.service.spreadsheets().get(
-                spreadsheetId=sheet_id
-            ).execute()
+            return _execute(self.service.spreadsheets().values().batchUpdate(
+                spreadsheetId=sheet_id,
+                body={'valueInputOption': value_input, 'data': data},
+                fields='totalUpdatedCells'
+            ))
+        except HttpError as error:
+            raise RuntimeError(f"Failed to write to Google Sheet: {error}")
+    
+    def _batch_update(self, sheet_id: str, data: List[Dict], value_input: str = 'RAW'):
+        """Write several {'range', 'values'} entries in one values().batchUpdate
+        (queued until flush inside a batch).
+        
+        `value_input` is the valueInputOption: 'RAW' stores values as given,
+        'USER_ENTERED' has Sheets parse them as if typed (numbers, dates,
+        formulas).
+        """
+        if self._in_batch():
+            # Queued per range, so a later write to a cell replaces an
+            # earlier one instead of both being sent
+            queued = self._local.writes.setdefault(sheet_id, {})
+            for entry in data:
+                for pending in queued.values():
+                    pending.pop(entry['range'], None)
+                queued.setdefault(value_input, {})[entry['range']] = entry['values']
+            self._forget_reads(sheet_id)
+            return None
+        return self._send_batch_update(sheet_id, data, value_input)
+    
+    def _get_first_sheet_name(self, sheet_id: str, deadline: Optional[float] = None) -> str:
+        """Get the name of the first sheet in a spreadsheet (cached per
+        spreadsheet; a failed read drops the entry, see _read_sheet)."""
+        name = self._sheet_names.get(sheet_id)
+        if name is None:
+            name = self._fetch_first_sheet_name(sheet_id, deadline)
+            if name is None:
+                return 'Sheet1'  # fallback, not cached
+            self._sheet_names[sheet_id] = name
+        return name
+    
+    def _fetch_first_sheet_name(self, sheet_id: str, deadline: Optional[float] = None) -> Optional[str]:
+        """Look up the first sheet's title via the spreadsheet metadata.
+        
+        With a `deadline` (see _execute), transient failures are raised so the
+        read falls back to its snapshot rather than guessing 'Sheet1'.
+        """
+        try:
+            # Only the sheet titles, not the whole spreadsheet resource
+            spreadsheet = _execute(self.service.spreadsheets().get(
+                spreadsheetId=sheet_id,
+                fields='sheets.properties.title'
+            ), deadline)
             sheets = spreadsheet.get('sheets', [])
             if sheets:
                 return sheets[0]['properties']['title']
         except Exception as e:
-            print(f"Warning: Could not get sheet name: {e}")
-        return 'Sheet1'  # fallback
+            if deadline is not None and _is_transient(e):
+                raise
+            logger.warning("Could not get sheet name: %s", e)
+        return None
     
-    def read_sheet(self, sheet_id: str, range_name: str = None) -> pd.DataFrame:
-        """Read data from Google Sheet. Raises error if unable to read."""
+    def read_sheet(self, sheet_id: str, range_name: str = None, allow_snapshot: bool = True) -> pd.DataFrame:
+        """Read data from Google Sheet. Raises error if unable to read.
+        
+        If Google is unreachable, the last copy saved on disk (see
+        _update_snapshot) is returned instead, unless `allow_snapshot` is False.
+        Such reads retry within _FALLBACK_RETRY_BUDGET only, and after falling
+        back serve the copy for _OUTAGE_TTL without asking Google again.
+        Lookups that decide which row to write must pass False: a stale copy
+        could point the write at the wrong row.
+        """
         if self.service is None:
             raise RuntimeError("Google Sheets service not initialized. Check credentials in secrets.toml")
         
+        key = (sheet_id, range_name)
+        deadline = None
+        if allow_snapshot:
+            fallback = self._fallbacks.get(key)
+            if fallback is not None and time.monotonic() - fallback[0] < _OUTAGE_TTL:
+                return fallback[1].copy()
+            deadline = time.monotonic() + _FALLBACK_RETRY_BUDGET
+        
+        try:
+            if self._in_batch():
+                # Queued writes to this sheet must land before it is read back
+                if sheet_id in self._local.writes:
+                    self._flush_writes(sheet_id)
+                if key not in self._local.reads:
+                    self._local.reads[key] = self._cached_read(sheet_id, range_name, deadline)
+                # Callers add columns in place, so hand out copies
+                return self._local.reads[key].copy()
+            
+            return self._cached_read(sheet_id, range_name, deadline).copy()
+        except _SheetUnavailable as error:
+            # Snapshots are never put in the read caches, so a later live
+            # lookup can't be served one
+            snapshot = _load_snapshot(sheet_id, range_name, error) if allow_snapshot else None
+            if snapshot is None:
+                raise
+            self._fallbacks[key] = (time.monotonic(), snapshot)
+            return snapshot.copy()
+    
+    def _cached_read(
+        self,
+        sheet_id: str,
+        range_name: Optional[str],
+        deadline: Optional[float] = None
+    ) -> pd.DataFrame:
+        """_read_sheet, reusing a read of the same range younger than _READ_TTL.
+        
+        The returned frame is shared; callers must not modify it.
+        """
+        key = (sheet_id, range_name)
+        cached = self._read_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < _READ_TTL:
+            return cached[1]
+        
+        read_at = time.monotonic()
+        df = self._read_sheet(sheet_id, range_name, deadline)
+        self._read_cache[key] = (read_at, df)
+        # Google answered, so the outage (if any) is over
+        self._fallbacks.pop(key, None)
+        return df
+    
+    def _forget_reads(self, sheet_id: str):
+        """Drop cached and batch-memoized reads of a sheet that was written to."""
+        for key in list(self._read_cache):
+            if key[0] == sheet_id:
+                self._read_cache.pop(key, None)
+        for key in list(self._fallbacks):
+            if key[0] == sheet_id:
+                self._fallbacks.pop(key, None)
+        if self._in_batch():
+            for key in [k for k in self._local.reads if k[0] == sheet_id]:
+                del self._local.reads[key]
+    
+    def _read_sheet(
+        self,
+        sheet_id: str,
+        range_name: Optional[str] = None,
+        deadline: Optional[float] = None
+    ) -> pd.DataFrame:
+        """Fetch a sheet from the API and convert it to a DataFrame.
+        
+        `deadline` bounds the retries of the whole read, sheet name lookup
+        included (see _execute).
+        """
         try:
             if range_name:
-                result = self.service.spreadsheets().values().get(
+                result = _execute(self.service.spreadsheets().values().get(
                     spreadsheetId=sheet_id,
-                    range=range_name
-                ).execute()
+                    range=range_name,
+                    fields='values'
+                ), deadline)
             else:
                 # Auto-discover the first sheet name instead of hardcoding 'Sheet1'
-                first_sheet = self._get_first_sheet_name(sheet_id)
-                result = self.service.spreadsheets().values().get(
+                first_sheet = self._get_first_sheet_name(sheet_id, deadline)
+                result = _execute(self.service.spreadsheets().values().get(
                     spreadsheetId=sheet_id,
-                    range=first_sheet
-                ).execute()
+                    range=first_sheet,
+                    fields='values'
+                ), deadline)
             
             values = result.get('values', [])
             
             if not values:
-                print(f"Warning: Sheet {sheet_id} is empty")
+                logger.warning("Sheet %s is empty", sheet_id)
                 return pd.DataFrame()
             
             # First row as headers
             headers = values[0]
             data = values[1:] if len(values) > 1 else []
             
-            # Pad rows to match header length
-            padded_data = [row + [''] * (len(headers) - len(row)) for row in data]
+            # Pad rows to match header length (the API drops trailing empty
+            # cells); full-width rows are passed through without a copy
+            width = len(headers)
+            padded_data = [row if len(row) >= width else row + [''] * (width - len(row)) for row in data]
             
             df = pd.DataFrame(padded_data, columns=headers)
-            print(f"✓ Read {len(df)} rows from sheet")
+            logger.debug("Read %d rows from sheet %s", len(df), sheet_id)
+            self._keep_snapshot(sheet_id, range_name, df)
             return df
         
         except HttpError as error:
+            # The first sheet may have been renamed; look it up again next time
+            self._sheet_names.pop(sheet_id, None)
+            if _is_transient(error):
+                raise _SheetUnavailable(f"Failed to read Google Sheet: {error}")
             raise RuntimeError(f"Failed to read Google Sheet: {error}")
+        except (OSError, httplib2.HttpLib2Error) as e:
+            # Network failure (DNS, connection, timeout)
+            raise _SheetUnavailable(f"Error reading sheet: {e}")
         except Exception as e:
             raise RuntimeError(f"Error reading sheet: {e}")
     
-    def write_sheet(self, sheet_id: str, range_name: str, values: List[List]):
-        """Write data to Google Sheet."""
+    def _keep_snapshot(self, sheet_id: str, range_name: Optional[str], df: pd.DataFrame):
+        """Hand a live read to the snapshot writer, at most once per
+        _SNAPSHOT_INTERVAL per range. `df` must not be modified afterwards."""
+        key = (sheet_id, range_name)
+        now = time.monotonic()
+        if now - self._snapshot_checked.get(key, float('-inf')) < _SNAPSHOT_INTERVAL:
+            return
+        self._snapshot_checked[key] = now
+        _snapshot_writer.submit(self._update_snapshot, key, df)
+    
+    def _update_snapshot(self, key: tuple, df: pd.DataFrame):
+        """Save a live read to disk only if it differs from the copy last
+        saved; otherwise just mark that copy as confirmed."""
+        saved = self._snapshots.get(key)
+        if saved is not None and saved.equals(df):
+            _touch_snapshot(*key)
+        elif _save_snapshot(*key, df):
+            self._snapshots[key] = df
+    
+    def prefetch_all(self):
+        """Read the roster, fleet and missions sheets concurrently into the
+        read cache, so managers built right after don't fetch them one by one.
+        
+        Best effort: a failed read is logged here and surfaces again when the
+        sheet is read for real. Reads go through read_sheet, so during an
+        outage each sheet waits out one short retry budget here, concurrently,
+        and later reads use its snapshot (see _OUTAGE_TTL).
+        """
+        if self.service is None:
+            return
+        
+        sheet_ids = [sheet_id for sheet_id in map(get_secret, _SHEET_ID_SECRETS) if sheet_id]
+        if not sheet_ids:
+            return
+        
+        with ThreadPoolExecutor(max_workers=len(sheet_ids)) as pool:
+            futures = [pool.submit(self.read_sheet, sheet_id) for sheet_id in sheet_ids]
+        
+        for sheet_id, future in zip(sheet_ids, futures):
+            if future.exception() is not None:
+                logger.warning("Could not prefetch sheet %s: %s", sheet_id, future.exception())
+    
+    def write_sheet(self, sheet_id: str, range_name: str, values: List[List], value_input: str = 'RAW'):
+        """Write data to Google Sheet (queued until flush inside a batch).
+        
+        See _batch_update for `value_input`.
+        """
         if self.service is None:
             raise RuntimeError("Google Sheets service not initialized. Check credentials in secrets.toml")
+        
+        if self._in_batch():
+            return self._batch_update(sheet_id, [{'range': range_name, 'values': values}], value_input)
+        
+        self._forget_reads(sheet_id)
         try:
             body = {'values': values}
-            result = self.service.spreadsheets().values().update(
+            result = _execute(self.service.spreadsheets().values().update(
                 spreadsheetId=sheet_id,
                 range=range_name,
-                valueInputOption='RAW',
-                body=body
-            ).execute()
+                valueInputOption=value_input,
+                body=body,
+                fields='updatedRange'
+            ))
             return result
         except HttpError as error:
             raise RuntimeError(f"Failed to write to Google Sheet: {error}")
@@ -177,43 +582,7 @@ class GoogleSheetsSync:
         if not sheet_id:
             raise RuntimeError("PILOT_ROSTER_SHEET_ID not configured in secrets.toml")
         
-        # Read current data
-        df = self.get_pilot_roster()
-        
-        # Find row index
-        idx = df[df['pilot_id'] == pilot_id].index
-        if len(idx) == 0:
-            return
-        
-        row_num = idx[0] + 2  # +1 for header, +1 for 1-indexing
-        
-        # Get the actual sheet name
-        first_sheet = self._get_first_sheet_name(sheet_id)
-        
-        # Find column indices dynamically
-        status_col_idx = None
-        assignment_col_idx = None
-        
-        if 'status' in df.columns:
-            status_col_idx = list(df.columns).index('status')
-        if 'current_assignment' in df.columns:
-            assignment_col_idx = list(df.columns).index('current_assignment')
-        
-        # Convert column index to letter (0=A, 1=B, etc.)
-        def col_idx_to_letter(idx):
-            return chr(ord('A') + idx)
-        
-        # Update status
-        if status_col_idx is not None:
-            status_col_letter = col_idx_to_letter(status_col_idx)
-            status_range = f'{first_sheet}!{status_col_letter}{row_num}'
-            self.update_cell(sheet_id, status_range, status)
-        
-        # Update assignment if provided
-        if assignment and assignment_col_idx is not None:
-            assignment_col_letter = col_idx_to_letter(assignment_col_idx)
-            assignment_range = f'{first_sheet}!{assignment_col_letter}{row_num}'
-            self.update_cell(sheet_id, assignment_range, assignment)
+        self._update_status(sheet_id, self._rows_for_write(sheet_id), 'pilot_id', pilot_id, status, assignment)
     
     def update_drone_status(self, drone_id: str, status: str, assignment: str = None):
         """Update drone status in Google Sheets (online only)."""
@@ -221,40 +590,62 @@ class GoogleSheetsSync:
         if not sheet_id:
             raise RuntimeError("DRONE_FLEET_SHEET_ID not configured in secrets.toml")
         
-        # Read current data
-        df = self.get_drone_fleet()
+        self._update_status(sheet_id, self._rows_for_write(sheet_id), 'drone_id', drone_id, status, assignment)
+    
+    def _rows_for_write(self, sheet_id: str) -> pd.DataFrame:
+        """A live read of a sheet, for finding the row a status update writes
+        (never a snapshot: a stale copy could point the write at the wrong row).
+        
+        Inside a batch the first lookup is kept for the rest of the batch and
+        doesn't flush the sheet's queued writes: status and assignment cell
+        writes never add, remove or reorder rows, so its row positions stay
+        valid. The returned frame may be shared; don't modify it.
+        """
+        if not self._in_batch():
+            return self.read_sheet(sheet_id, allow_snapshot=False)
+        
+        rows = self._local.rows
+        if sheet_id not in rows:
+            df = self._local.reads.get((sheet_id, None))
+            rows[sheet_id] = df if df is not None else self._cached_read(sheet_id, None)
+        return rows[sheet_id]
+    
+    def _update_status(
+        self,
+        sheet_id: str,
+        df: pd.DataFrame,
+        id_column: str,
+        entity_id: str,
+        status: str,
+        assignment: Optional[str]
+    ):
+        """Write a row's status (and assignment, if given) in one batchUpdate.
         
+        `df` must be a live read of the sheet (not a snapshot); the row to
+        write is its position there.
+        """
         # Find row index
-        idx = df[df['drone_id'] == drone_id].index
+        idx = df[df[id_column] == entity_id].index
         if len(idx) == 0:
             return
         
-        row_num = idx[0] + 2
+        row_num = idx[0] + 2  # +1 for header, +1 for 1-indexing
         
         # Get the actual sheet name
         first_sheet = self._get_first_sheet_name(sheet_id)
         
-        # Find column indices dynamically
-        status_col_idx = None
-        assignment_col_idx = None
-        
-        if 'status' in df.columns:
-            status_col_idx = list(df.columns).index('status')
-        if 'current_assignment' in df.columns:
-            assignment_col_idx = list(df.columns).index('current_assignment')
-        
-        # Convert column index to letter (0=A, 1=B, etc.)
-        def col_idx_to_letter(idx):
-            return chr(ord('A') + idx)
+        columns = list(df.columns)
+        data = []
         
         # Update status
-        if status_col_idx is not None:
-            status_col_letter = col_idx_to_letter(status_col_idx)
-            status_range = f'{first_sheet}!{status_col_letter}{row_num}'
-            self.update_cell(sheet_id, status_range, status)
+        if 'status' in columns:
+            status_col_letter = col_idx_to_letter(columns.index('status'))
+            data.append({'range': f'{first_sheet}!{status_col_letter}{row_num}', 'values': [[status]]})
         
         # Update assignment if provided
-        if assignment and assignment_col_idx is not None:
-            assignment_col_letter = col_idx_to_letter(assignment_col_idx)
-            assignment_range = f'{first_sheet}!{assignment_col_letter}{row_num}'
-            self.update_cell(sheet_id, assignment_range, assignment)
+        if assignment and 'current_assignment' in columns:
+            assignment_col_letter = col_idx_to_letter(columns.index('current_assignment'))
+            data.append({'range': f'{first_sheet}!{assignment_col_letter}{row_num}', 'values': [[assignment]]})
+        
+        if data:
+            self._batch_update(sheet_id, data)
@@ -1,14 +1,37 @@
 """Utility functions for the drone operations coordinator."""
+import re
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple, Union
+
+# Characters that make a str.contains pattern more than plain text
+_REGEX_META = re.compile(r'[.^$*+?{}\[\]\\|()]')
+
+
+def _is_missing(value) -> bool:
+    """pd.isna for a single cell value, without the NumPy dispatch."""
+    return (
+        value is None or value is pd.NA or value is pd.NaT or
+        (isinstance(value, float) and value != value)
+    )
 
 
 def parse_date(date_str: str) -> datetime:
     """Parse date string to datetime object."""
+    try:
+        return _parse_date_cached(date_str)
+    except TypeError:  # unhashable, so not a date string either
+        return None
+
+
+@lru_cache(maxsize=1024)
+def _parse_date_cached(date_str: str) -> Optional[datetime]:
+    """strptime each distinct date string once (datetimes are immutable)."""
     try:
         return datetime.strptime(date_str, "%Y-%m-%d")
-    except:
+    except (TypeError, ValueError):
         return None
 
 
@@ -36,6 +59,27 @@ def calculate_mission_duration(start_date: str, end_date: str) -> int:
     return (end - start).days + 1
 
 
+def parse_date_column(dates: pd.Series) -> pd.Series:
+    """Vectorized parse_date: NaT wherever parse_date would return None."""
+    return pd.to_datetime(dates, format="%Y-%m-%d", errors='coerce')
+
+
+def dates_overlap_mask(start1, end1, start2, end2) -> np.ndarray:
+    """Vectorized dates_overlap over parsed (datetime64) date arrays.
+    
+    Compares the raw datetime64 values element-wise; NaT never compares
+    true, so pairs with an unparseable date don't overlap.
+    """
+    start1, end1, start2, end2 = (np.asarray(dates) for dates in (start1, end1, start2, end2))
+    return (start1 <= end2) & (start2 <= end1)
+
+
+def mission_duration_column(start_dates: pd.Series, end_dates: pd.Series) -> pd.Series:
+    """Vectorized calculate_mission_duration (0 where a date doesn't parse)."""
+    days = (parse_date_column(end_dates) - parse_date_column(start_dates)).dt.days + 1
+    return days.fillna(0)
+
+
 def calculate_pilot_cost(daily_rate: float, start_date: str, end_date: str) -> float:
     """Calculate total cost for a pilot based on mission duration."""
     duration = calculate_mission_duration(start_date, end_date)
@@ -44,60 +88,130 @@ def calculate_pilot_cost(daily_rate: float, start_date: str, end_date: str) -> f
 
 def parse_skills(skills_str: str) -> List[str]:
     """Parse skills string into list."""
-    if pd.isna(skills_str) or not skills_str:
+    if _is_missing(skills_str) or not skills_str:
         return []
     return [s.strip() for s in str(skills_str).split(",")]
 
 
 def parse_certifications(certs_str: str) -> List[str]:
     """Parse certifications string into list."""
-    if pd.isna(certs_str) or not certs_str:
+    if _is_missing(certs_str) or not certs_str:
         return []
     return [c.strip() for c in str(certs_str).split(",")]
 
 
+@lru_cache(maxsize=1024)
+def _rated_all_weather(weather_resistance: str) -> bool:
+    """Whether a weather_resistance rating clears any forecast, not just fair
+    weather (the rating rules of is_weather_compatible)."""
+    resistance = weather_resistance.lower()
+    if not resistance:
+        return False
+    
+    # IP43 or higher can handle rain
+    if "ip43" in resistance or "rain" in resistance:
+        return True
+    
+    # No weather resistance means clear sky only
+    return not ("none" in resistance or "clear sky only" in resistance)
+
+
+def all_weather_mask(weather_resistance: pd.Series) -> pd.Series:
+    """Drones is_weather_compatible clears for any forecast, not just fair weather."""
+    resistance = weather_resistance.fillna('').astype(str)
+    # A fleet uses a handful of ratings; classify each distinct one once
+    ratings = {rating: _rated_all_weather(rating) for rating in resistance.unique()}
+    return resistance.map(ratings).astype(bool)
+
+
+def weather_compatible_mask(
+    weather_resistance: pd.Series, 
+    mission_weather: Union[str, pd.Series],
+    all_weather: Optional[pd.Series] = None
+) -> pd.Series:
+    """Vectorized is_weather_compatible over a weather_resistance column.
+    
+    `mission_weather` is one forecast for every row, or a column aligned
+    with `weather_resistance` giving each row's own forecast. Pass a
+    precomputed all_weather_mask as `all_weather` to skip the text matching.
+    """
+    if isinstance(mission_weather, pd.Series):
+        fair = mission_weather.astype(str).str.lower().isin(["sunny", "cloudy"])
+    elif mission_weather.lower() in ["sunny", "cloudy"]:
+        return pd.Series(True, index=weather_resistance.index)
+    else:
+        fair = False
+    
+    if all_weather is None:
+        all_weather = all_weather_mask(weather_resistance)
+    return fair | all_weather
+
+
+def lowered_text(values: pd.Series) -> pd.Series:
+    """A text column lowercased once, '' where a value is missing."""
+    return values.str.lower().fillna('')
+
+
+def contains_text(values: pd.Series, pattern: str, lowered: Optional[pd.Series] = None) -> pd.Series:
+    """Vectorized values.str.contains(pattern, case=False, na=False).
+    
+    Pass the column's lowered_text (it may cover more rows; it is aligned on
+    the index) as `lowered` to match plain-text patterns as a substring
+    search rather than a case-insensitive regex.
+    """
+    if lowered is None or _REGEX_META.search(pattern):
+        return values.str.contains(pattern, case=False, na=False)
+    return lowered.loc[values.index].str.contains(pattern.lower(), regex=False)
+
+
+def contains_any(series: pd.Series, needles: List[str]) -> pd.Series:
+    """Vectorized case-sensitive 'any needle is a substring' mask."""
+    pattern = '|'.join(re.escape(n) for n in needles)
+    return series.astype(str).str.contains(pattern, regex=True)
+
+
+@lru_cache(maxsize=4096)
+def _skill_set(skills_str: str) -> frozenset:
+    """parse_skills as a frozenset, computed once per distinct string."""
+    return frozenset(parse_skills(skills_str))
+
+
+@lru_cache(maxsize=4096)
+def _certification_set(certs_str: str) -> frozenset:
+    """parse_certifications as a frozenset, computed once per distinct string."""
+    return frozenset(parse_certifications(certs_str))
+
+
 def skills_match(pilot_skills: str, required_skills: str) -> bool:
     """Check if pilot has required skills."""
-    pilot_skill_list = parse_skills(pilot_skills)
-    required_skill_list = parse_skills(required_skills)
-    
-    return all(skill in pilot_skill_list for skill in required_skill_list)
+    return _skill_set(required_skills) <= _skill_set(pilot_skills)
 
 
 def certifications_match(pilot_certs: str, required_certs: str) -> bool:
     """Check if pilot has required certifications."""
-    pilot_cert_list = parse_certifications(pilot_certs)
-    required_cert_list = parse_certifications(required_certs)
-    
-    return all(cert in pilot_cert_list for cert in required_cert_list)
+    return _certification_set(required_certs) <= _certification_set(pilot_certs)
 
 
 def is_weather_compatible(drone_weather_resistance: str, mission_weather: str) -> bool:
     """Check if drone is compatible with mission weather."""
-    if pd.isna(drone_weather_resistance) or not drone_weather_resistance:
-        return mission_weather.lower() in ["sunny", "cloudy"]
-    
-    weather_resistance = str(drone_weather_resistance).lower()
-    mission_weather_lower = mission_weather.lower()
+    fair_weather = mission_weather.lower() in ["sunny", "cloudy"]
+    if _is_missing(drone_weather_resistance) or not drone_weather_resistance:
+        return fair_weather
     
-    # IP43 or higher can handle rain
-    if "ip43" in weather_resistance or "rain" in weather_resistance:
-        return True
-    
-    # No weather resistance means clear sky only
-    if "none" in weather_resistance or "clear sky only" in weather_resistance:
-        return mission_weather_lower in ["sunny", "cloudy"]
-    
-    return True
+    return fair_weather or _rated_all_weather(str(drone_weather_resistance))
 
 
-def is_maintenance_due(maintenance_due: str) -> bool:
-    """Check if maintenance is due (before or on today's date)."""
-    if pd.isna(maintenance_due) or not maintenance_due:
+def is_maintenance_due(maintenance_due: str, now: Optional[datetime] = None) -> bool:
+    """Check if maintenance is due (before or on today's date).
+    
+    Pass `now` when checking many drones, to compare them all against one
+    clock reading.
+    """
+    if _is_missing(maintenance_due) or not maintenance_due:
         return False
     
     maintenance_date = parse_date(maintenance_due)
     if not maintenance_date:
         return False
     
-    return maintenance_date <= datetime.now()
+    return maintenance_date <= (now or datetime.now())